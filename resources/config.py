@@ -8,21 +8,50 @@ ALPHA_VANTAGE_BASE_URL = "https://www.alphavantage.co/query"
 ALPHA_VANTAGE_API_KEY = ""  # TODO: Add your ALPHA VANTAGE API key here
 ALPHA_VANTAGE_MAX_RETRY = 5
 ALPHA_VANTAGE_WAIT_SECONDS_BEFORE_RETRY = 30
+ALPHA_VANTAGE_WAIT_SECONDS_BEFORE_FAILED_REQUEST_RETRY = 1  # doubled after each failed try
+ALPHA_VANTAGE_REQUEST_TIMEOUT_SECONDS = 60
+ALPHA_VANTAGE_MAX_CONNECTIONS = 4  # max nr. of connections kept open, and of concurrent downloads
 ALPHA_VANTAGE_REACHED_LIMIT_ERROR_MSG = """
 {
     "Note": "Thank you for using Alpha Vantage! Our standard API call frequency is 5 calls per minute and 500 calls per day. Please visit https://www.alphavantage.co/premium/ if you would like to target a higher API call frequency."
 }
 """
+ALPHA_VANTAGE_RATE_LIMITER_ENABLED = True  # space requests proactively, instead of waiting for the limit to be reached
+ALPHA_VANTAGE_REQUESTS_PER_MINUTE = 5
+ALPHA_VANTAGE_REQUESTS_PER_DAY = 500
+ALPHA_VANTAGE_REQUESTS_BURST = 1  # nr. of requests that can be sent without spacing them; 1 guarantees the per minute limit over any 60 seconds
+MK_DATA_CACHE_ENABLED = True
+MK_DATA_CACHE_MAX_AGE_SECONDS = 12 * 60 * 60  # cached data is topped up if the requested period is not fully cached, and it's older than this
+MK_DATA_CACHE_OFFLINE = False  # serve market data only from the cache, without sending any request
+MK_DATA_STORE_ENABLED = False  # keep simulation market data in a memory-mapped columnar store, which is opened instead of downloading the data, if it covers the period
+MK_DATA_COMPACT_DTYPES = False  # keep simulation market data as float32 (prices and volume), halving its memory; performances may differ by up to ~(2 * nr. of transactions + 2) * 6e-8 relative to the float64 ones, see MkData
+HISTORICAL_PRICES_MAX_TICKERS = 32  # nr. of tickers whose history is kept in memory for historical price lookups
 
 RESOURCES_PATH = pathlib.Path(__file__).parent.resolve()
 LSTM_MODELS_PATH = os.path.join(RESOURCES_PATH, "../models/lstm")
 TEMP_DIR = os.path.join(RESOURCES_PATH, "../temp")
 ERRORS_DIR = os.path.join(TEMP_DIR, "errors")
+MK_DATA_CACHE_DIR = os.path.join(TEMP_DIR, "mk_data_cache")
+MK_DATA_STORE_DIR = os.path.join(TEMP_DIR, "mk_data_store")
+ALPHA_VANTAGE_RATE_LIMITER_STATE_FILE = os.path.join(TEMP_DIR, "alpha_vantage_rate_limiter.json")
 
 # simulator configs
 SIMULATOR_LOG_TRANSACTIONS = False
 SIMULATOR_TRANSACTIONS_FEE = 0.00
 SIMULATOR_INITIAL_CASH = 100
+SIMULATOR_BATCH_ADVICES = True  # use batch advices of the strategies that support them, instead of asking for an advice per data subset
+SIMULATOR_MK_DATA_LOOKBACK_MAX_TRIES = 5  # nr. of times market data is requested with a longer lookback, if there are not enough entries before the start date
+
+# process pool configs
+PROCESS_POOL_WORKER_THREADS = 1  # max nr. of tensorflow/BLAS threads of each worker process (parallel simulations, pre-training of LSTM models); there is a worker per CPU core by default
+
+# ml configs
+ML_MODEL_REGISTRY_MAX_MODELS = 32  # max nr. of LSTM models kept in memory by each process, shared by all the strategies
+ML_MODEL_REGISTRY_MAX_MEMORY_MB = 1024  # max size of the weights of the LSTM models kept in memory by each process
+ML_PRETRAINING_ENABLED = True  # train all the LSTM models a simulation needs before it starts, in parallel processes, instead of one after another while simulating
+ML_PRETRAINING_WORKERS = None  # max nr. of processes training LSTM models; defaults to the nr. of CPU cores
+ML_INCREMENTAL_TRAINING_ENABLED = False  # fine-tune each yearly LSTM model from the previous year's model on the new data only, instead of training it from scratch on the whole history
+ML_INCREMENTAL_TRAINING_REPLAY_ENTRIES = 365  # nr. of entries before the new data that incrementally trained models are trained on again, so they keep seeing older data
 
 # tensorflow configs
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
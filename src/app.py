@@ -4,6 +4,7 @@ import time
 from resources import config
 from src.app_config import app_config
 from src.helper import args_helper
+from src.mk_data_provider import mk_data_provider_factory
 from src.model.single_ticker_portfolio import SingleTickerPortfolio
 from src.strategy import strategy_factory
 from src.strategy.strategy import IStrategy
@@ -13,9 +14,13 @@ log = logging.getLogger(__name__)
 
 
 def run(params):
+    mk_data_provider = mk_data_provider_factory.get_concrete_mk_data_provider(params.mk_data_provider_type, params.mk_data_path)
+    log.info(f"Market data provider: {mk_data_provider.get_name()}")
+
     if params.simulate_strategy:
-        mk_data = strategy_simulator_helper.prepare_simulation_mk_data(params.ticker, params.subset_data_length, params.start_date, params.end_date, params.interval)
-        strategy: IStrategy = strategy_factory.get_concrete_strategy(params.strategy_type, params.ticker, params.subset_data_length)
+        mk_data = strategy_simulator_helper.prepare_simulation_mk_data(params.ticker, params.subset_data_length, params.start_date, params.end_date, params.interval, mk_data_provider,
+                                                                       params.compact_mk_data or config.MK_DATA_COMPACT_DTYPES)
+        strategy: IStrategy = strategy_factory.get_concrete_strategy(params.strategy_type, params.ticker, params.subset_data_length, mk_data_provider, params.interval)
 
         # simulate strategy
         strategy_result_portfolio: SingleTickerPortfolio = strategy_simulator_helper.simulate(mk_data, strategy, params.subset_data_length)
@@ -28,9 +33,10 @@ def run(params):
             strategy_simulator_helper.plot_strategy_performance(mk_data, strategy_result_portfolio, config.MARK_BUY_AND_SELL, params.calculate_over_market_performance)
 
     if params.find_best_performance:
-        mk_data = strategy_simulator_helper.prepare_simulation_mk_data(params.ticker, params.max_subset_data_length, params.start_date, params.end_date, params.interval)
+        mk_data = strategy_simulator_helper.prepare_simulation_mk_data(params.ticker, params.max_subset_data_length, params.start_date, params.end_date, params.interval, mk_data_provider,
+                                                                       params.compact_mk_data or config.MK_DATA_COMPACT_DTYPES)
         performances_by_subset_data_length = strategy_simulator_helper.get_strategy_performances_by_subset_data_length(params.min_subset_data_length, params.max_subset_data_length, mk_data,
-                                                                                                                       params.strategy_type)
+                                                                                                                       params.strategy_type, params.workers, mk_data_provider)
 
         if params.calculate_over_market_performance:
             performances_by_subset_data_length = strategy_simulator_helper.get_strategy_over_market_performances(performances_by_subset_data_length, mk_data, config.SIMULATOR_INITIAL_CASH)
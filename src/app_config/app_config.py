@@ -43,7 +43,7 @@ def config_logger():
 
 
 def create_dirs():
-    dirs = [config.LSTM_MODELS_PATH, config.ERRORS_DIR]
+    dirs = [config.LSTM_MODELS_PATH, config.ERRORS_DIR, config.MK_DATA_CACHE_DIR, config.MK_DATA_STORE_DIR]
 
     for _dir in dirs:
         if not os.path.exists(_dir):
@@ -0,0 +1,118 @@
+import sys
+import time
+from io import StringIO, BytesIO, BufferedReader
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from requests import Response
+
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields
+from src.helper.mk_data import av_crypto_helper
+from src.helper.mk_data.av_crypto_helper import _ResponseStream
+
+# daily full history of a ticker (~25 years), and intraday 1min data from a month (what an AV intraday request returns) up to ~2 years
+DAILY_ROWS = 9_000
+DEFAULT_INTRADAY_ROWS = [45_000, 250_000, 1_000_000]
+REPEATS = 3
+
+
+def generate_av_csv_text(rows: int, interval: str = intervals.MIN_1) -> str:
+    """
+    :return: CSV in AV's format, with `rows` entries of the interval, newest first
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range(end="2020-12-31 23:59", periods=rows, freq=intervals.get_timedelta(interval))[::-1]
+    closes = np.round(100 + np.cumsum(rng.normal(0, 0.1, rows)), 4)
+    df = DataFrame({
+        "timestamp": dates.strftime("%Y-%m-%d" if interval == intervals.DAILY else "%Y-%m-%d %H:%M:%S"),
+        "open": closes + 0.5,
+        "high": closes + 1,
+        "low": closes - 1,
+        "close": closes,
+        "volume": rng.integers(1_000, 1_000_000, rows)
+    })
+    return df.to_csv(index=False)
+
+
+def parse_generic(raw_csv_text: str) -> DataFrame:
+    """
+    The generic parsing path: dtypes and timestamp format are inferred, and the data is sorted
+    """
+    df = pd.read_csv(StringIO(raw_csv_text), parse_dates=['timestamp'], index_col='timestamp') \
+        .sort_index() \
+        .rename(
+        columns={
+            "open": MkDataFields.OPEN,
+            "high": MkDataFields.HIGH,
+            "low": MkDataFields.LOW,
+            "close": MkDataFields.CLOSE,
+            "volume": MkDataFields.VOLUME
+        }
+    )
+    df.index.names = [MkDataFields.TIMESTAMP]
+    return df
+
+
+def parse_generic_response(response: Response) -> DataFrame:
+    """
+    The generic path of a response: the whole body is decoded into a string first, and parsed generically
+    """
+    return parse_generic(response.text)
+
+
+def parse_streamed_response(response: Response) -> DataFrame:
+    """
+    The streamed path of a response (see av_crypto_helper._request_mk_data_with_retry): the body is parsed by the fast path while being read
+    """
+    with BufferedReader(_ResponseStream(response), buffer_size=_ResponseStream.CHUNK_SIZE) as csv_stream:
+        return av_crypto_helper.av_csv_to_df(csv_stream)
+
+
+def get_response(raw_csv_body: bytes) -> Response:
+    """
+    :return: a response with the body, read from memory as if it was received from the connection
+    """
+    response = Response()
+    response.status_code = 200
+    response.encoding = "utf-8"
+    response.raw = BytesIO(raw_csv_body)
+    return response
+
+
+def get_best_time(parse, get_source) -> float:
+    """
+    :param get_source: function getting what is parsed, which is not timed (e.g. a new response, as a response body can be read only once)
+    """
+    best_time = float("inf")
+    for _ in range(REPEATS):
+        source = get_source()
+        start = time.perf_counter()
+        parse(source)
+        best_time = min(best_time, time.perf_counter() - start)
+    return best_time
+
+
+def run(rows: int, interval: str):
+    raw_csv_text = generate_av_csv_text(rows, interval)
+    raw_csv_body = raw_csv_text.encode()
+    expected_df = parse_generic(raw_csv_text)
+    pd.testing.assert_frame_equal(expected_df, av_crypto_helper._av_csv_text_to_df(raw_csv_text))
+    pd.testing.assert_frame_equal(expected_df, parse_streamed_response(get_response(raw_csv_body)))
+
+    generic_time = get_best_time(parse_generic, lambda: raw_csv_text)
+    fast_time = get_best_time(av_crypto_helper._av_csv_text_to_df, lambda: raw_csv_text)
+    generic_response_time = get_best_time(parse_generic_response, lambda: get_response(raw_csv_body))
+    streamed_response_time = get_best_time(parse_streamed_response, lambda: get_response(raw_csv_body))
+    print(f"Parsed {rows} {interval} rows ({len(raw_csv_body) / 2 ** 20:.1f} MB), best of {REPEATS}:")
+    print(f"    text, generic parsing:     {generic_time:.3f}s")
+    print(f"    text, fast parsing:        {fast_time:.3f}s ({generic_time / fast_time:.2f}x)")
+    print(f"    response, generic parsing: {generic_response_time:.3f}s")
+    print(f"    response, streamed:        {streamed_response_time:.3f}s ({generic_response_time / streamed_response_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    run(DAILY_ROWS, intervals.DAILY)
+    for intraday_rows in ([int(arg) for arg in sys.argv[1:]] or DEFAULT_INTRADAY_ROWS):
+        run(intraday_rows, intervals.MIN_1)
@@ -0,0 +1,93 @@
+import argparse
+import time
+
+from pandas import DataFrame, Timestamp
+
+from resources import config
+from src.helper import ml_lstm_helper
+from src.mk_data_provider import mk_data_provider_factory
+from src.mk_data_provider.impl.columnar_store_mk_data_provider import ColumnarStoreMkDataProvider
+from src.mk_data_provider.impl.csv_dir_mk_data_provider import CsvDirMkDataProvider
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+from src.strategy.impl.ml_lstm_strategy import MODEL_DATA_INTERVAL
+
+DEFAULT_TICKER = "BTC"
+DEFAULT_YEARS = 3
+TIME_STEPS = 30
+EPOCHS = 10
+
+
+def get_year_data(raw_data: DataFrame, year: int) -> DataFrame:
+    """
+    :return: the entries of the year, plus the (TIME_STEPS + 1) entries before them, so each entry of the year gets a sample
+    """
+    first_entry_index = raw_data.index.searchsorted(Timestamp(f"{year}-01-01"))
+    last_entry_index = raw_data.index.searchsorted(Timestamp(f"{year}-12-31"), side="right")
+    return raw_data.iloc[max(0, first_entry_index - TIME_STEPS - 1):last_entry_index]
+
+
+def run(ticker: str, years: int, mk_data_provider: IMkDataProvider = None):
+    """
+    Trains the yearly models of the last years of the ticker both from scratch and incrementally (as MlLstmStrategy does),
+    and compares their training time and their accuracy on the following year, which none of them has been trained on
+    The models are not saved, so the benchmark does not interfere with the models used by the strategy
+    The market data is read once, before any training is timed
+    :param mk_data_provider: source of the market data; defaults to the network provider, see mk_data_provider_factory
+    """
+    mk_data_provider = mk_data_provider or mk_data_provider_factory.get_concrete_mk_data_provider()
+    raw_data = mk_data_provider.get_historical_data(ticker, MODEL_DATA_INTERVAL, _from=None, to=None)
+    last_year = raw_data.index[-1].year
+    first_year = last_year - years
+
+    # the first incremental model starts from a model trained from scratch
+    previous_cutoff = Timestamp(f"{first_year - 1}-12-31")
+    incremental_model = ml_lstm_helper.compute_model(raw_data=raw_data.loc[:previous_cutoff], time_steps=TIME_STEPS, test_data_split_pct=0, epochs=EPOCHS)
+
+    print(f"Yearly models of {ticker}, {TIME_STEPS} time steps, {EPOCHS} epochs, {config.ML_INCREMENTAL_TRAINING_REPLAY_ENTRIES} replayed entries:")
+    for year in range(first_year, last_year):
+        cutoff = Timestamp(f"{year}-12-31")
+        model_data = raw_data.loc[:cutoff]
+
+        start = time.perf_counter()
+        full_model = ml_lstm_helper.compute_model(raw_data=model_data, time_steps=TIME_STEPS, test_data_split_pct=0, epochs=EPOCHS)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        training_data = ml_lstm_helper.get_incremental_training_data(model_data, previous_cutoff, TIME_STEPS, config.ML_INCREMENTAL_TRAINING_REPLAY_ENTRIES)
+        incremental_model = ml_lstm_helper.compute_model(raw_data=training_data, time_steps=TIME_STEPS, test_data_split_pct=0, epochs=EPOCHS,
+                                                         initial_model=incremental_model)
+        incremental_time = time.perf_counter() - start
+
+        test_data = get_year_data(raw_data, year + 1)
+        full_accuracy = ml_lstm_helper.get_accuracy(full_model, test_data, TIME_STEPS)
+        incremental_accuracy = ml_lstm_helper.get_accuracy(incremental_model, test_data, TIME_STEPS)
+        print(f"    model until {cutoff.date()}, accuracy on {year + 1}:")
+        print(f"        full retraining:      {full_accuracy:.2%} ({len(model_data)} entries, {full_time:.1f}s)")
+        print(f"        incremental training: {incremental_accuracy:.2%} ({len(training_data)} entries, {incremental_time:.1f}s, {full_time / incremental_time:.1f}x)")
+
+        previous_cutoff = cutoff
+
+
+def get_mk_data_provider(data_dir: str = None, store_dir: str = None) -> IMkDataProvider:
+    """
+    :param data_dir: directory with CSV files, see CsvDirMkDataProvider
+    :param store_dir: directory of the columnar store, see ColumnarStoreMkDataProvider
+    :return: provider reading the local data, if any of the directories is given, otherwise the network provider
+    """
+    if data_dir is not None:
+        return mk_data_provider_factory.get_concrete_mk_data_provider(CsvDirMkDataProvider, data_dir)
+    if store_dir is not None:
+        return mk_data_provider_factory.get_concrete_mk_data_provider(ColumnarStoreMkDataProvider, store_dir)
+    return mk_data_provider_factory.get_concrete_mk_data_provider()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compară antrenarea de la zero a modelelor LSTM anuale cu antrenarea lor incrementală")
+    parser.add_argument("ticker", type=str, nargs="?", default=DEFAULT_TICKER, help=f"Simbolul bunului; implicit, {DEFAULT_TICKER}")
+    parser.add_argument("years", type=int, nargs="?", default=DEFAULT_YEARS, help=f"Numărul de ani ale căror modele sunt antrenate; implicit, {DEFAULT_YEARS}")
+    mk_data_source = parser.add_mutually_exclusive_group()
+    mk_data_source.add_argument("--data-dir", type=str, help="Directorul local cu fișiere CSV din care sunt citite datele istorice, în loc să fie descărcate")
+    mk_data_source.add_argument("--store-dir", type=str, help="Directorul depozitului columnar din care sunt citite datele istorice, în loc să fie descărcate")
+    args = parser.parse_args()
+
+    run(args.ticker, args.years, get_mk_data_provider(args.data_dir, args.store_dir))
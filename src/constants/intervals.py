@@ -0,0 +1,50 @@
+from pandas import Timedelta
+
+"""
+Time intervals represented by each entry of market data, with the same names Alpha Vantage uses for intraday intervals
+"""
+
+MIN_1 = "1min"
+MIN_5 = "5min"
+MIN_15 = "15min"
+MIN_60 = "60min"
+DAILY = "1d"
+
+INTRADAY_INTERVALS = [MIN_1, MIN_5, MIN_15, MIN_60]
+
+INTERVAL_TO_TIMEDELTA = {
+    MIN_1: Timedelta(minutes=1),
+    MIN_5: Timedelta(minutes=5),
+    MIN_15: Timedelta(minutes=15),
+    MIN_60: Timedelta(minutes=60),
+    DAILY: Timedelta(days=1)
+}
+
+
+def get_all():
+    """
+    :return: all supported intervals, from the shortest to the longest
+    """
+    return [*INTERVAL_TO_TIMEDELTA]
+
+
+def is_intraday(interval: str) -> bool:
+    return interval in INTRADAY_INTERVALS
+
+
+def get_timedelta(interval: str) -> Timedelta:
+    """
+    :return: time covered by an entry (bar) of the interval
+    """
+    if interval not in INTERVAL_TO_TIMEDELTA:
+        raise NotImplementedError(f"Interval '{interval}' is not supported; supported intervals: {get_all()}")
+    return INTERVAL_TO_TIMEDELTA[interval]
+
+
+def get_finer_intervals(interval: str) -> list:
+    """
+    :return: supported intervals whose bars can be resampled into bars of the given interval, from the longest to the shortest
+    """
+    interval_timedelta = get_timedelta(interval)
+    return [finer_interval for finer_interval, finer_timedelta in reversed(INTERVAL_TO_TIMEDELTA.items())
+            if finer_timedelta < interval_timedelta and interval_timedelta % finer_timedelta == Timedelta(0)]
@@ -17,3 +17,7 @@ class MkDataFields(object):
                and not callable(attr)
                and not type(attr) is staticmethod
         ]
+
+
+# fields with a value for each timestamp of the market data, in the order they are stored
+DATA_FIELDS = [MkDataFields.OPEN, MkDataFields.HIGH, MkDataFields.LOW, MkDataFields.CLOSE, MkDataFields.VOLUME]
@@ -0,0 +1,14 @@
+from src.error.mk_data_request_error import MkDataRequestError
+
+
+class MkDataBulkRequestError(MkDataRequestError):
+    def __init__(self, errors_by_ticker: dict, mk_data_list: list):
+        """
+        :param errors_by_ticker: key: ticker whose request has failed -> value: the error of the request
+        :param mk_data_list: market data of each request, in the same order as the requests; None for the failed requests
+        """
+        self.errors_by_ticker = errors_by_ticker
+        self.mk_data_list = mk_data_list
+        failed_requests = "; ".join(f"{ticker}: {error}" for ticker, error in errors_by_ticker.items())
+        super().__init__(f"Could not get market data for {len(errors_by_ticker)} out of {len(mk_data_list)} requests, "
+                         f"of tickers {list(errors_by_ticker)}; errors: {failed_requests}")
@@ -4,7 +4,9 @@ from argparse import RawTextHelpFormatter
 
 from pandas import Timestamp
 
+from src.constants import intervals
 from src.error.simulator_parameters_error import SimulatorParametersError
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
 from src.model.program_parameters import ProgramParameters
 from src.strategy.strategy import IStrategy
 
@@ -23,11 +25,19 @@ FIND_BEST_PERFORMANCE_PARAM = "--find_best_performance"
 PRINT_RESULTS_PARAM = "--print_results"
 PLOT_RESULTS_PARAM = "--plot_results"
 CALCULATE_OVER_MARKET_PERFORMANCE_PARAM = "--calculate_over_market_performance"
+COMPACT_MK_DATA_PARAM = "--compact_mk_data"
 
 SUBSET_DATA_LENGTH_PARAM = "-subset_data_length"
 MIN_SUBSET_DATA_LENGTH_PARAM = "-min_subset_data_length"
 MAX_SUBSET_DATA_LENGTH_PARAM = "-max_subset_data_length"
 
+WORKERS_PARAM = "-workers"
+MK_DATA_PROVIDER_PARAM = "-mk_data_provider"
+MK_DATA_PATH_PARAM = "-mk_data_path"
+
+DEFAULT_MK_DATA_PROVIDER_NAME = "AlphaVantageMkDataProvider"
+CSV_DIR_MK_DATA_PROVIDER_NAME = "CsvDirMkDataProvider"
+
 
 def parse_args_into_params():
     parser = _get_parser()
@@ -48,7 +58,7 @@ def _get_parser():
     # required positional argument
     parser.add_argument(START_DATE_PARAM, type=Timestamp, help="Data de start folosită pentru simulări pe date istorice")
     parser.add_argument(END_DATE_PARAM, type=Timestamp, help="Data de sfârșire a perioadei folosite pentru simulări pe date istorice")
-    parser.add_argument(INTERVAL_PARAM, type=str, help="Intervalul de timp reprezentat de fiecare intrare a datelor istorice")
+    parser.add_argument(INTERVAL_PARAM, type=str, help=f"Intervalul de timp reprezentat de fiecare intrare a datelor istorice: {', '.join(intervals.get_all())}")
     parser.add_argument(TICKER_PARAM, type=str, help="Simbolul bunului pentru care trebuie făcute simulările")
     parser.add_argument(STRATEGY_NAME_PARAM, type=str, help="Denumirea strategiei aplicate")
 
@@ -58,6 +68,9 @@ def _get_parser():
     flags.add_argument(PRINT_RESULTS_PARAM, action="store_true", help="Parametru pentru afișarea rezultatelor simulării (sau simulărilor) în formă de text")
     flags.add_argument(PLOT_RESULTS_PARAM, action="store_true", help="Parametru pentru afișarea rezultatelor simulării (sau simulărilor) în formă grafică")
     flags.add_argument(CALCULATE_OVER_MARKET_PERFORMANCE_PARAM, action="store_true", help="Parametru pentru afișarea rezultatelor în raport cu performanța naturală a bunului pe bursă")
+    flags.add_argument(COMPACT_MK_DATA_PARAM, action="store_true",
+                       help="Parametru pentru păstrarea datelor istorice în memorie ca float32 (prețuri și volum), cu jumătate din memoria folosită implicit; "
+                            "performanțele calculate pot diferi foarte puțin (eroare relativă de ordinul 1e-7 pe tranzacție)")
 
     conditionally_optional_args = parser.add_argument_group('conditionally optional arguments')
     conditionally_optional_args.add_argument(SUBSET_DATA_LENGTH_PARAM, type=int, required=SIMULATE_STRATEGY_PARAM in sys.argv,
@@ -72,6 +85,19 @@ def _get_parser():
                                              help="Numărul maxim de intrări precedente folosite pentru analiză și luare a fiecărei decizii de tranzacționare; "
                                                   f"acest parametru este obligatoriu în cazul în care parametrul `{FIND_BEST_PERFORMANCE_PARAM}` a fost inclus")
 
+    optional_args = parser.add_argument_group('additional arguments')
+    optional_args.add_argument(WORKERS_PARAM, type=int,
+                               help=f"Numărul de procese în care sunt executate în paralel simulările parametrului `{FIND_BEST_PERFORMANCE_PARAM}`; "
+                                    "implicit, este egal cu numărul de nuclee ale procesorului, fiecare proces folosind PROCESS_POOL_WORKER_THREADS fire de execuție")
+    optional_args.add_argument(MK_DATA_PROVIDER_PARAM, type=str, default=DEFAULT_MK_DATA_PROVIDER_NAME,
+                               help="Denumirea sursei datelor istorice: AlphaVantageMkDataProvider (descărcare de pe Alpha Vantage), "
+                                    "CsvDirMkDataProvider (director local cu fișiere CSV), sau ColumnarStoreMkDataProvider (depozit local columnar); "
+                                    f"implicit, este {DEFAULT_MK_DATA_PROVIDER_NAME}")
+    optional_args.add_argument(MK_DATA_PATH_PARAM, type=str,
+                               help="Calea locală a datelor istorice, pentru sursele care citesc fișiere locale: "
+                                    f"directorul cu fișiere CSV, obligatoriu pentru {CSV_DIR_MK_DATA_PROVIDER_NAME}, "
+                                    "sau directorul depozitului columnar, implicit cel din configurație")
+
     return parser
 
 
@@ -89,7 +115,11 @@ def _generate_params(args):
         calculate_over_market_performance=_get_arg_value(args, CALCULATE_OVER_MARKET_PERFORMANCE_PARAM),
         subset_data_length=_get_arg_value(args, SUBSET_DATA_LENGTH_PARAM),
         min_subset_data_length=_get_arg_value(args, MIN_SUBSET_DATA_LENGTH_PARAM),
-        max_subset_data_length=_get_arg_value(args, MAX_SUBSET_DATA_LENGTH_PARAM))
+        max_subset_data_length=_get_arg_value(args, MAX_SUBSET_DATA_LENGTH_PARAM),
+        workers=_get_arg_value(args, WORKERS_PARAM),
+        mk_data_provider_type=_get_mk_data_provider_type(_get_arg_value(args, MK_DATA_PROVIDER_PARAM)),
+        mk_data_path=_get_arg_value(args, MK_DATA_PATH_PARAM),
+        compact_mk_data=_get_arg_value(args, COMPACT_MK_DATA_PARAM))
 
 
 def _get_arg_value(args, arg_key):
@@ -104,6 +134,14 @@ def _get_strategy_type(strategy_name):
     return strategy_name_to_class_dict[strategy_name]
 
 
+def _get_mk_data_provider_type(mk_data_provider_name):
+    provider_name_to_class_dict = {provider_class.__name__: provider_class for provider_class in IMkDataProvider.__subclasses__()}
+    if mk_data_provider_name not in provider_name_to_class_dict:
+        raise SimulatorParametersError(f"Market data provider name '{mk_data_provider_name}' is not in the list of available providers: {list(provider_name_to_class_dict.keys())}")
+
+    return provider_name_to_class_dict[mk_data_provider_name]
+
+
 def _validate_params(params):
     """
     Additional validation that is not covered by argparse setup
@@ -112,5 +150,9 @@ def _validate_params(params):
     """
     if not params.print_results and not params.plot_results:
         raise SimulatorParametersError("Nothing to do, both print_results and plot_results flags are disabled")
-    if params.interval != "1d":
-        raise NotImplementedError(f"Only '1d' interval is supported yet")
+    if params.workers is not None and params.workers < 1:
+        raise SimulatorParametersError(f"Nr. of workers must be at least 1, but got: {params.workers}")
+    if params.mk_data_provider_type.__name__ == CSV_DIR_MK_DATA_PROVIDER_NAME and not params.mk_data_path:
+        raise SimulatorParametersError(f"{MK_DATA_PATH_PARAM} is required for {CSV_DIR_MK_DATA_PROVIDER_NAME}")
+    if params.interval not in intervals.get_all():
+        raise SimulatorParametersError(f"Interval '{params.interval}' is not in the list of supported intervals: {intervals.get_all()}")
@@ -0,0 +1,26 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(file_path: str, mode: str = "wb") -> Iterator[IO]:
+    """
+    Writes the file under a temporary name first, and moves it to file_path only once it's fully written,
+    so concurrent readers never see a partially written file, and a crash never leaves one behind
+    If the write fails, the temporary file is removed, and the previous file (if any) is kept as it is
+    :param mode: mode the temporary file is opened with, "wb" or "w"
+    :return: the temporary file, to write the content into
+    """
+    temp_file_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_file_path, mode) as temp_file:
+            yield temp_file
+        os.replace(temp_file_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_file_path)
+        except OSError:
+            pass  # the temporary file has not been created
+        raise
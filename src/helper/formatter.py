@@ -2,6 +2,8 @@ from datetime import datetime, timedelta
 
 from pandas import Timestamp
 
+from src.constants import intervals
+
 
 def obj_to_str(obj, exclude: list = None):
     """
@@ -18,10 +20,10 @@ def obj_to_str(obj, exclude: list = None):
 
 
 def get_timedelta(units, interval):
-    if interval == "1d":
-        return timedelta(days=units)
-    else:
-        raise NotImplementedError()
+    """
+    :return: time covered by the given nr. of entries (bars) of the interval, if there are no gaps between them
+    """
+    return intervals.get_timedelta(interval) * units
 
 
 def add_time_and_convert_to_string(timestamp: Timestamp, date_format: str, to_add: timedelta) -> str:
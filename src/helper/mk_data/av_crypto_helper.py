@@ -1,40 +1,133 @@
 import logging
+import threading
 import time
-from datetime import timedelta
-from io import StringIO
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import StringIO, BufferedReader, RawIOBase
+from typing import Tuple, List
 
+import numpy as np
 import pandas as pd
 import requests
-from pandas import DataFrame, Timestamp, Timedelta
+from numpy import ndarray
+from pandas import DataFrame, Timestamp, Timedelta, DatetimeIndex
 from requests import Response
+from requests.adapters import HTTPAdapter
 
 from resources import config
-from resources.config import ALPHA_VANTAGE_BASE_URL, ALPHA_VANTAGE_API_KEY
+from src.constants import intervals
 from src.constants.mk_data_fields import MkDataFields
+from src.error.mk_data_bulk_request_error import MkDataBulkRequestError
 from src.error.mk_data_format_error import MkDataFormatError
 from src.error.mk_data_request_error import MkDataRequestError
+from src.helper.mk_data import mk_data_cache, mk_data_helper
+from src.helper.mk_data.rate_limiter import RateLimiter
+from src.model.mk_data import MkData
 
 log = logging.getLogger(__name__)
 
+# intraday requests without a month return the data of the trailing days only
+AV_INTRADAY_TRAILING_DAYS = 30
+
+_AV_CSV_TIMESTAMP_COLUMN = "timestamp"
+_AV_CSV_COLUMNS_TO_MK_DATA_FIELDS = {
+    "open": MkDataFields.OPEN,
+    "high": MkDataFields.HIGH,
+    "low": MkDataFields.LOW,
+    "close": MkDataFields.CLOSE,
+    "volume": MkDataFields.VOLUME
+}
+# volume is left to be inferred, as it's not always an integer
+_AV_CSV_COLUMNS_TO_DTYPES = {
+    **{av_column: MkData.DATA_COLUMNS_TO_DTYPES[field] for av_column, field in _AV_CSV_COLUMNS_TO_MK_DATA_FIELDS.items() if field != MkDataFields.VOLUME},
+    _AV_CSV_TIMESTAMP_COLUMN: str
+}
+
+# key: ticker -> value: (timestamps, close prices, loading time in seconds since the epoch), ordered from the least to the most recently used
+_historical_close_prices = OrderedDict()
+
+_rate_limiter: RateLimiter = None
+_session: requests.Session = None
+_init_lock = threading.Lock()
+
 
 def get_historical_price(ticker, asof: Timestamp):
     """
     Gets historical price for the provided date
     If provided date has no data (e.g., because it's a bank holiday), the method will return the most recent price prior to the provided date
+    The history of the ticker is loaded once, and kept in memory for the next calls (see _get_historical_close_prices)
     :param ticker: ticker for which the price should be provided
     :param asof: date for which the price should be provided
     :return: last available price of the provided date, or the most recent one prior to this date
     """
-    left_offset = timedelta(days=5)  # 5d to account for any bank holidays/weekends
-    _from = asof - left_offset
-    to = asof
+    asof = Timestamp(asof)
+    timestamps, close_prices = _get_historical_close_prices(ticker, asof)
+
+    # position of the last entry on or before the provided date
+    position = np.searchsorted(timestamps, asof.to_datetime64(), side="right") - 1
+    if position < 0:
+        raise MkDataFormatError(f"Got no market data while retrieving last historical price for ticker[{ticker}] as of: {asof}; "
+                                f"the first available data timestamp is '{Timestamp(timestamps[0])}'")
+
+    return close_prices[position]
+
+
+def _get_historical_close_prices(ticker, asof: Timestamp) -> Tuple[ndarray, ndarray]:
+    """
+    Gets the timestamps and close prices of the whole history of the ticker from memory;
+    the history is (re)loaded if it's not in memory yet, or if it ends before the provided date, unless it has been loaded within the last day
+    (then there is no entry for the date yet, e.g. today's entry is not published yet)
+    Only the histories of the last HISTORICAL_PRICES_MAX_TICKERS used tickers are kept in memory
+    :return: a tuple with sorted timestamps, and the close price of each of them
+    """
+    history = _historical_close_prices.get(ticker)
+    if history is None or (asof > history[0][-1] and time.time() - history[2] >= intervals.get_timedelta(intervals.DAILY).total_seconds()):
+        data = download_daily_historical_data(ticker)
+        history = data.index.to_numpy(dtype="datetime64[ns]"), data[MkDataFields.CLOSE].to_numpy(), time.time()
+
+    _historical_close_prices[ticker] = history
+    _historical_close_prices.move_to_end(ticker)
+    while len(_historical_close_prices) > config.HISTORICAL_PRICES_MAX_TICKERS:
+        _historical_close_prices.popitem(last=False)
+
+    last_available_date = Timestamp(history[0][-1])
+    if asof > last_available_date:
+        raise MkDataRequestError(f"The last available data timestamp is '{last_available_date}', "
+                                 f"while the date has been requested for up to '{asof}' (excluding)")
 
-    data = download_daily_historical_data(ticker, _from=_from, to=to)
-    if data.empty:
-        raise MkDataFormatError(f"Got empty market data while retrieving last historical price for ticker[{ticker}] as of: {asof}")
+    return history[0], history[1]
 
-    # last close price
-    return data[MkDataFields.CLOSE].iloc[-1]
+
+def download_daily_historical_data_bulk(mk_data_requests: List[Tuple[str, Timestamp, Timestamp]], max_workers: int = None) -> List[MkData]:
+    """
+    Downloads daily historical data of multiple tickers concurrently, see download_daily_historical_data
+    Requests share the same connections pool and rate limiter, while failed requests are retried separately for each ticker
+    A request failing after its retries does not affect the other ones: the data of the successful requests is cached as usual (if MK_DATA_CACHE_ENABLED),
+    and returned along with the errors of the failed ones
+    :param mk_data_requests: list of (ticker, _from, to) tuples, with the same meaning as download_daily_historical_data's parameters
+    :param max_workers: max nr. of concurrent downloads; defaults to ALPHA_VANTAGE_MAX_CONNECTIONS
+    :return: market data of each request, in the same order as the requests
+    :raises MkDataBulkRequestError: once all requests are done, if any of them has failed; it names the failed tickers,
+                                    and holds the market data of the successful requests
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or config.ALPHA_VANTAGE_MAX_CONNECTIONS) as executor:
+        futures = [executor.submit(download_daily_historical_data, ticker, _from, to) for ticker, _from, to in mk_data_requests]
+        wait(futures)
+
+    mk_data_list = []
+    errors_by_ticker = OrderedDict()
+    for (ticker, _from, to), future in zip(mk_data_requests, futures):
+        try:
+            mk_data_list.append(MkData(ticker, _from, to, intervals.DAILY, future.result()))
+        except Exception as e:
+            log.warning(f"Could not get market data for ticker[{ticker}] from {_from} to {to}: {e}")
+            errors_by_ticker[ticker] = e
+            mk_data_list.append(None)
+
+    if errors_by_ticker:
+        raise MkDataBulkRequestError(errors_by_ticker, mk_data_list) from next(iter(errors_by_ticker.values()))
+
+    return mk_data_list
 
 
 def download_daily_historical_data(ticker, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
@@ -47,22 +140,182 @@ def download_daily_historical_data(ticker, _from: Timestamp = None, to: Timestam
 
     Note: to take into account that present day is not returned
     """
-    output_size = _get_req_output_size(_from, to)
-    params = _get_av_daily_historical_data_params(ticker, output_size)
+    return download_historical_data(ticker, intervals.DAILY, _from, to)
 
-    response_text = _request_mk_data_with_retry(params)
 
-    df = _av_csv_text_to_df(response_text)
-    _validate_timeframe(df, _from, to)
-    df = _get_slice(df, _from, to)
+def download_historical_data(ticker, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+    """
+    Same as download_daily_historical_data, for any of the supported intervals (see intervals)
+    Intraday data is downloaded month by month, unless the trailing days AV returns by default are enough, see _download_intraday_historical_data
+    """
+    if interval not in intervals.get_all():
+        raise MkDataRequestError(f"Interval '{interval}' is not supported; supported intervals: {intervals.get_all()}")
+
+    if config.MK_DATA_CACHE_ENABLED:
+        df = _get_cached_historical_data(ticker, interval, _from, to)
+    elif interval == intervals.DAILY:
+        df = _download_daily_historical_data(ticker, _get_req_output_size(_from, to))
+    else:
+        df = _download_intraday_historical_data(ticker, interval, _from, to)
+
+    mk_data_helper.validate_timeframe(df, _from, to)
+    df = mk_data_helper.get_slice(df, _from, to)
 
     return df
 
 
-def _request_mk_data_with_retry(params):
+def _get_cached_historical_data(ticker, interval: str, _from: Timestamp, to: Timestamp) -> DataFrame:
+    """
+    Serves the data from the local cache if it covers the requested period (see CachedMkData.covers);
+    otherwise downloads only what is missing, if possible, and updates the cache
+    In offline mode the cache is served as it is, and the data is never downloaded
+    :return: all cached data for the ticker, which is expected to include the requested period
+    """
+    cached_mk_data = mk_data_cache.load(ticker, interval)
+
+    if config.MK_DATA_CACHE_OFFLINE:
+        if cached_mk_data is None:
+            raise MkDataRequestError(f"Offline mode is enabled, but there is no cached market data for ticker[{ticker}]")
+        log.debug(f"Offline mode: serve cached market data for ticker[{ticker}]")
+        return cached_mk_data.data
+
+    if cached_mk_data is not None and cached_mk_data.covers(_from, to, interval):
+        log.debug(f"Serve cached market data for ticker[{ticker}]")
+        return cached_mk_data.data
+
+    if interval != intervals.DAILY:
+        cached_mk_data = _top_up_cached_intraday_historical_data(ticker, interval, cached_mk_data, _from, to)
+        mk_data_cache.save(ticker, interval, cached_mk_data)
+        return cached_mk_data.data
+
+    output_size = _get_cache_top_up_output_size(cached_mk_data, _from, to)
+    log.info(f"Cached market data for ticker[{ticker}] does not cover the period from {_from} to {to}; download with output size: {output_size}")
+
+    downloaded_data = _download_daily_historical_data(ticker, output_size)
+    cached_mk_data = mk_data_cache.merge(cached_mk_data, downloaded_data, is_full_history=output_size == "full")
+    mk_data_cache.save(ticker, intervals.DAILY, cached_mk_data)
+
+    return cached_mk_data.data
+
+
+def _top_up_cached_intraday_historical_data(ticker, interval: str, cached_mk_data, _from: Timestamp, to: Timestamp):
+    """
+    Downloads the intraday data missing from the cache: the data before the cache, and the data after it, each starting/ending within the month the cache starts/ends,
+    so the downloaded data always overlaps the cache, and the cache never has gaps
+    The cache is considered fresh only if the latest download reached the most recent data
+    :return: the topped up cache
+    """
+    if cached_mk_data is None or cached_mk_data.data.empty:
+        log.info(f"There is no cached {interval} market data for ticker[{ticker}]; download the period from {_from} to {to}")
+        downloaded_data = _download_intraday_historical_data(ticker, interval, _from, to)
+        return mk_data_cache.merge(None, downloaded_data, is_full_history=False, is_latest_data=_is_intraday_period_up_to_now(to), fetched_to=to)
+
+    cached_data_start = cached_mk_data.data.index[0]
+    cached_data_end = cached_mk_data.data.index[-1]
+    misses_newer_data = not cached_mk_data.covers_end(to, interval)
+
+    if _from is not None and _from < cached_data_start:
+        log.info(f"Cached {interval} market data for ticker[{ticker}] starts on {cached_data_start}; download the period from {_from}")
+        older_data = _download_intraday_historical_data(ticker, interval, _from, cached_data_start)
+        cached_mk_data = mk_data_cache.merge(cached_mk_data, older_data, is_full_history=False, is_latest_data=False)
+
+    if misses_newer_data:
+        log.info(f"Cached {interval} market data for ticker[{ticker}] ends on {cached_data_end}; download the period up to {to}")
+        newer_data = _download_intraday_historical_data(ticker, interval, cached_data_end, to)
+        cached_mk_data = mk_data_cache.merge(cached_mk_data, newer_data, is_full_history=False, is_latest_data=_is_intraday_period_up_to_now(to), fetched_to=to)
+
+    return cached_mk_data
+
+
+def _get_cache_top_up_output_size(cached_mk_data, _from: Timestamp, to: Timestamp):
+    """
+    If the cache misses only the most recent data, and it's not older than what a compact response contains, the compact response is enough to top it up
+    Otherwise, the output size is decided in the same way as without a cache
+    """
+    if cached_mk_data is None or cached_mk_data.data.empty:
+        return _get_req_output_size(_from, to)
+
+    cached_data_start = cached_mk_data.data.index[0]
+    cached_data_end = cached_mk_data.data.index[-1]
+    misses_older_data = not cached_mk_data.is_full_history and (_from is None or _from < cached_data_start)
+    if misses_older_data or cached_data_end < Timestamp.now() - Timedelta(days=100):
+        return "full"
+    else:
+        return "compact"
+
+
+def _download_daily_historical_data(ticker, output_size) -> DataFrame:
+    params = _get_av_daily_historical_data_params(ticker, output_size)
+    with _request_mk_data_with_retry(params) as csv_stream:
+        return av_csv_to_df(csv_stream)
+
+
+def _download_intraday_historical_data(ticker, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+    """
+    Downloads the intraday data of the period: with a single request if the period is within the trailing days AV returns by default,
+    otherwise with a request for each month of the period (AV returns a whole month per request)
+    :return: the downloaded data, sorted by timestamp; it may contain more data than the period
+    """
+    months = _get_intraday_months(_from, to)
+    if not months:
+        return _download_intraday_month_data(ticker, interval, month=None)
+
+    log.info(f"Download {interval} market data for ticker[{ticker}] month by month: {months[0]} - {months[-1]}")
+    monthly_data = [_download_intraday_month_data(ticker, interval, month) for month in months]
+    data = pd.concat(monthly_data)
+    return data[~data.index.duplicated(keep="last")].sort_index()
+
+
+def _get_intraday_months(_from: Timestamp = None, to: Timestamp = None) -> List[str]:
+    """
+    :return: months ("YYYY-mm") of the period, or an empty list if the trailing days returned by default cover the period
+    """
+    now = Timestamp.now()
+    if _from is None or _from >= now - Timedelta(days=AV_INTRADAY_TRAILING_DAYS - 1):
+        return []
+
+    end = now if _is_intraday_period_up_to_now(to) else to
+    return list(pd.period_range(start=_from, end=end, freq="M").strftime("%Y-%m"))
+
+
+def _is_intraday_period_up_to_now(to: Timestamp = None) -> bool:
+    """
+    :return: whether the period ends within the trailing days, in which case the most recent data is downloaded as well
+    """
+    return to is None or to >= Timestamp.now() - Timedelta(days=AV_INTRADAY_TRAILING_DAYS - 1)
+
+
+def _download_intraday_month_data(ticker, interval: str, month: str = None) -> DataFrame:
+    params = _get_av_intraday_historical_data_params(ticker, interval, month)
+    with _request_mk_data_with_retry(params) as csv_stream:
+        return av_csv_to_df(csv_stream)
+
+
+def _request_mk_data_with_retry(params) -> BufferedReader:
+    """
+    Sends the request, retrying it if the api-key limit has been reached, or the request has failed
+    :return: stream of the CSV response body, which is read from the connection only while being parsed
+    """
     for i in range(0, config.ALPHA_VANTAGE_MAX_RETRY):
-        response: Response = _send_request_with_check(ALPHA_VANTAGE_BASE_URL, params)
-        response_text = response.text
+        if config.ALPHA_VANTAGE_RATE_LIMITER_ENABLED:
+            _get_rate_limiter().acquire()
+
+        try:
+            response: Response = _send_request_with_check(config.ALPHA_VANTAGE_BASE_URL, params)
+        except (MkDataRequestError, requests.RequestException) as e:
+            log.info(f"Market data request for symbol[{params.get('symbol')}] has failed (try {i + 1} out of {config.ALPHA_VANTAGE_MAX_RETRY}): {e}")
+            if i < config.ALPHA_VANTAGE_MAX_RETRY - 1:
+                time.sleep(config.ALPHA_VANTAGE_WAIT_SECONDS_BEFORE_FAILED_REQUEST_RETRY * 2 ** i)
+                continue
+            else:
+                raise MkDataRequestError("Reached limit of retries to request market data") from e
+
+        response_stream = _ResponseStream(response)
+        if not response_stream.is_json():
+            return BufferedReader(response_stream, buffer_size=_ResponseStream.CHUNK_SIZE)
+
+        # AV responds with a JSON message instead of CSV in case of errors
+        response_text = response_stream.read_all_text()
         if response_text.strip() == config.ALPHA_VANTAGE_REACHED_LIMIT_ERROR_MSG.strip():
             log.info(f"Reached api-key limit of requesting Market Data (try {i + 1} out of {config.ALPHA_VANTAGE_MAX_RETRY})")
             if i < config.ALPHA_VANTAGE_MAX_RETRY - 1:
@@ -72,11 +325,37 @@ def _request_mk_data_with_retry(params):
             else:
                 raise MkDataRequestError("Reached limit of retries to request market data")
         else:
-            return response_text
+            raise MkDataFormatError(content=response_text, save_to_file=True)
 
     raise MkDataRequestError("Could not get proper response for market data request")
 
 
+def _get_rate_limiter() -> RateLimiter:
+    """
+    :return: the rate limiter shared by all requests of the process, created from the config on first use
+    """
+    global _rate_limiter
+    with _init_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(config.ALPHA_VANTAGE_REQUESTS_PER_MINUTE, config.ALPHA_VANTAGE_REQUESTS_PER_DAY,
+                                        config.ALPHA_VANTAGE_RATE_LIMITER_STATE_FILE, config.ALPHA_VANTAGE_REQUESTS_BURST)
+        return _rate_limiter
+
+
+def _get_session() -> requests.Session:
+    """
+    :return: the session shared by all requests of the process, which keeps up to ALPHA_VANTAGE_MAX_CONNECTIONS connections open for reuse
+    """
+    global _session
+    with _init_lock:
+        if _session is None:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.ALPHA_VANTAGE_MAX_CONNECTIONS)
+            _session = requests.Session()
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
 def _get_req_output_size(start_date: pd.Timestamp, end_date: pd.Timestamp):
     def requires_data_older_than_100_days():
         return start_date < Timestamp.now() - Timedelta(days=100)
@@ -96,59 +375,109 @@ def _get_av_daily_historical_data_params(ticker, output_size):
         'symbol': ticker,
         'outputsize': output_size,
         'datatype': "csv",
-        'apikey': ALPHA_VANTAGE_API_KEY
+        'apikey': config.ALPHA_VANTAGE_API_KEY
     }
 
 
+def _get_av_intraday_historical_data_params(ticker, interval, month=None):
+    params = {
+        'function': "TIME_SERIES_INTRADAY",
+        'symbol': ticker,
+        'interval': interval,
+        'outputsize': "full",
+        'datatype': "csv",
+        'apikey': config.ALPHA_VANTAGE_API_KEY
+    }
+    if month is not None:
+        params['month'] = month
+    return params
+
+
 def _send_request_with_check(base_url, params):
-    response: Response = requests.get(base_url, params=params)
+    response: Response = _get_session().get(base_url, params=params, timeout=config.ALPHA_VANTAGE_REQUEST_TIMEOUT_SECONDS, stream=True)
     if response.status_code != 200:
+        response.close()
         raise MkDataRequestError(f"Got an unexpected response when pooling market data: {str(response)}")
     return response
 
 
 def _av_csv_text_to_df(raw_csv_text):
+    return av_csv_to_df(StringIO(raw_csv_text), raw_csv_text)
+
+
+def av_csv_to_df(csv_source, raw_csv_text: str = None) -> DataFrame:
+    """
+    Parses AV CSV into a DataFrame sorted by timestamp, with MkDataFields names
+    Columns are parsed straight into their final dtypes, and timestamps as ISO 8601, instead of letting pandas infer them;
+    AV sends the newest entries first, so the data is just reversed rather than sorted, unless it's not in descending order
+    :param csv_source: file path, or file-like object (text or binary) with the CSV content
+    :param raw_csv_text: the CSV content as text, if available, to be saved in case of format errors
+    :return: parsed DataFrame
+    """
     try:
-        raw_data = StringIO(raw_csv_text)
-        df = pd.read_csv(raw_data, parse_dates=['timestamp'], index_col='timestamp') \
-            .sort_index() \
-            .rename(
-            columns={
-                "open": MkDataFields.OPEN,
-                "high": MkDataFields.HIGH,
-                "low": MkDataFields.LOW,
-                "close": MkDataFields.CLOSE,
-                "volume": MkDataFields.VOLUME
-            }
-        )
-        df.index.names = [MkDataFields.TIMESTAMP]
-        return df
-    except ValueError:
-        raise MkDataFormatError(content=raw_csv_text, save_to_file=True)
-
-
-def _validate_timeframe(data: DataFrame, start_date: Timestamp, end_date: Timestamp) -> None:
-    first_available_date = data.index[0]
-    if start_date is not None and start_date < first_available_date:
-        raise MkDataRequestError(f"The first available data timestamp is '{first_available_date}', "
-                                 f"while the date has been requested from '{start_date}' (including)")
-
-    last_available_date = data.index[-1]
-    if end_date is not None and end_date > last_available_date:
-        raise MkDataRequestError(f"The last available data timestamp is '{last_available_date}', "
-                                 f"while the date has been requested for up to '{end_date}' (excluding)")
+        df = pd.read_csv(csv_source, dtype=_AV_CSV_COLUMNS_TO_DTYPES, engine="c")
+        timestamps = df.pop(_AV_CSV_TIMESTAMP_COLUMN)
+
+        # AV timestamps are ISO 8601 ("YYYY-mm-dd", or "YYYY-mm-dd HH:MM:SS" for intraday data), which numpy parses natively
+        df.index = DatetimeIndex(timestamps.to_numpy().astype("datetime64[ns]"), name=MkDataFields.TIMESTAMP)
+        df = df.rename(columns=_AV_CSV_COLUMNS_TO_MK_DATA_FIELDS)
+
+        if df.index.is_monotonic_increasing:
+            return df
+        elif df.index.is_monotonic_decreasing:
+            return df.iloc[::-1]
+        else:
+            return df.sort_index()
+    except (ValueError, KeyError, TypeError) as e:
+        content = raw_csv_text if raw_csv_text is not None else _get_consumed_content(csv_source)
+        raise MkDataFormatError(message=str(e), content=content, save_to_file=True)
+
+
+def _get_consumed_content(csv_source) -> str:
+    if isinstance(csv_source, str):
+        return f"[content of file: {csv_source}]"
+    if isinstance(csv_source, BufferedReader) and isinstance(csv_source.raw, _ResponseStream):
+        return f"[partial content, only the first chunk of the response is available]\n{csv_source.raw.first_chunk.decode(errors='replace')}"
+    return "[content not available]"
+
+
+class _ResponseStream(RawIOBase):
+    """
+    Readable stream over the body of a streamed response, so the body can be parsed while being received
+    The first chunk is read upfront, to tell a CSV body apart from a JSON message
+    """
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, response: Response):
+        self._response = response
+        self._chunks = response.iter_content(chunk_size=self.CHUNK_SIZE)
+        self.first_chunk = next(self._chunks, b"")
+        self._chunk = memoryview(self.first_chunk)
+
+    def is_json(self) -> bool:
+        return self.first_chunk.lstrip().startswith(b"{")
+
+    def read_all_text(self) -> str:
+        content = bytes(self._chunk) + b"".join(self._chunks)
+        self._chunk = memoryview(b"")
+        return content.decode(self._response.encoding or "utf-8", errors="replace")
 
+    def readable(self):
+        return True
 
-def _get_slice(full_data: DataFrame, start_date: Timestamp, end_date: Timestamp) -> DataFrame:
-    if start_date is None and end_date is None:
-        return full_data
+    def readinto(self, buffer) -> int:
+        while len(self._chunk) == 0:
+            next_chunk = next(self._chunks, None)
+            if next_chunk is None:
+                return 0
+            self._chunk = memoryview(next_chunk)
 
-    start_index = 0
-    if start_date is not None:
-        start_index = full_data.index.get_loc(start_date)
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        return size
 
-    end_index = len(full_data)
-    if end_date is not None:
-        end_index = full_data.index.get_loc(end_date)
+    def close(self):
+        self._response.close()
+        super().close()
 
-    return full_data[start_index:end_index + 1]
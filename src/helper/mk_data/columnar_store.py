@@ -0,0 +1,247 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from numpy import ndarray
+from pandas import DataFrame, DatetimeIndex, Timestamp
+
+from resources import config
+from src.constants.mk_data_fields import MkDataFields, DATA_FIELDS
+from src.helper import file_helper
+from src.helper.mk_data import mk_data_helper
+
+log = logging.getLogger(__name__)
+
+_MANIFEST_FILE_NAME = "manifest.json"
+_GENERATION = "generation"
+_LENGTH = "length"
+
+
+class ColumnarMkData:
+    """
+    Market data stored column by column: a contiguous array per data field, plus an array with the timestamps
+    When opened from a store, the arrays are memory-mapped to the store files, so nothing is read until it's accessed,
+    and slicing by date returns views over the same arrays, without copying any data
+    """
+
+    def __init__(self, timestamps: ndarray, columns: Dict[str, ndarray], store_dir: str = None, start: int = 0):
+        """
+        :param timestamps: datetime64[ns] array, sorted ascending
+        :param columns: key: data field -> value: array with a value per timestamp
+        :param store_dir: directory with the store files the arrays are mapped to, if any (a generation of the store, which is never modified, see save)
+        :param start: position of the first entry within the store files
+        """
+        self.timestamps = timestamps
+        self.columns = columns
+        self.store_dir = store_dir
+        self.start = start
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    def get_values(self, field: str) -> ndarray:
+        """
+        :param field: a data field, or MkDataFields.TIMESTAMP
+        :return: the values of the field, without copying them
+        """
+        if field == MkDataFields.TIMESTAMP:
+            return self.timestamps
+        return self.columns[field]
+
+    def slice(self, before: Timestamp = None, after: Timestamp = None) -> "ColumnarMkData":
+        """
+        Same as DataFrame.truncate: keeps the entries between before and after (inclusive, the whole day if after has no time, see mk_data_helper.get_end_bound),
+        but returns views instead of copies
+        """
+        start = 0 if before is None else int(np.searchsorted(self.timestamps, Timestamp(before).to_datetime64(), side="left"))
+        end = len(self.timestamps) if after is None else int(np.searchsorted(self.timestamps, mk_data_helper.get_end_bound(after).to_datetime64(), side="right"))
+        return self.slice_positions(start, end)
+
+    def slice_positions(self, start: int = 0, end: int = None) -> "ColumnarMkData":
+        """
+        Same as slice, but by position: keeps the entries from start (inclusive) up to end (exclusive)
+        """
+        end = len(self.timestamps) if end is None else end
+        end = max(start, end)
+
+        columns = {field: values[start:end] for field, values in self.columns.items()}
+        return ColumnarMkData(self.timestamps[start:end], columns, self.store_dir, self.start + start)
+
+    def to_df(self) -> DataFrame:
+        """
+        :return: the data as a DataFrame indexed by timestamp; the values are copied into memory
+        """
+        index = DatetimeIndex(np.asarray(self.timestamps), name=MkDataFields.TIMESTAMP)
+        return DataFrame({field: np.asarray(self.columns[field]) for field in DATA_FIELDS if field in self.columns}, index=index)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getstate__(self):
+        # data mapped to a store is sent to other processes as a reference to the store, and mapped again there, instead of being copied
+        if self.store_dir is not None:
+            return {"store_dir": self.store_dir, "start": self.start, "length": len(self.timestamps)}
+        return self.__dict__
+
+    def __setstate__(self, state):
+        if "length" not in state:
+            self.__dict__.update(state)
+            return
+
+        store_data = _open_column_files(state["store_dir"])
+        start, end = state["start"], state["start"] + state["length"]
+        self.__init__(store_data.timestamps[start:end], {field: values[start:end] for field, values in store_data.columns.items()}, state["store_dir"], start)
+
+
+def open_store(ticker: str, interval: str, root_dir: str = None) -> Optional[ColumnarMkData]:
+    """
+    :param root_dir: directory with the stores of all tickers; defaults to MK_DATA_STORE_DIR
+    :return: the market data stored for the ticker and interval, memory-mapped, or None if there is no (readable) store
+    """
+    store_dir = get_store_dir(ticker, interval, root_dir)
+    if not os.path.isdir(store_dir):
+        return None
+
+    try:
+        return _open_store_dir(store_dir)
+    except (OSError, ValueError) as e:
+        log.warning(f"Could not open market data store, it will be ignored: {store_dir}; error: {e}")
+        return None
+
+
+def get_covering_slice(ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None, root_dir: str = None) -> Optional[ColumnarMkData]:
+    """
+    :return: stored market data between _from and to (inclusive, the whole day if to has no time, see mk_data_helper.get_end_bound),
+             as views over the memory-mapped store, or None if the store does not cover the period
+    """
+    columnar_data = open_store(ticker, interval, root_dir)
+    if columnar_data is None or columnar_data.empty:
+        return None
+
+    # the store never has gaps, so it's enough to check its bounds
+    if (_from is not None and Timestamp(_from) < Timestamp(columnar_data.timestamps[0])) \
+            or (to is not None and mk_data_helper.get_end_bound(to, interval) > Timestamp(columnar_data.timestamps[-1])):
+        return None
+
+    return columnar_data.slice(before=_from, after=to)
+
+
+def save(ticker: str, interval: str, data: DataFrame):
+    """
+    Writes the market data into the store of the ticker and interval, replacing the previous one
+    The columns are written into a new generation directory of the store, and the manifest of the store is switched to it atomically
+    (see file_helper.atomic_write) only once all of them are written, so a crash or a concurrent reader never sees columns of different saves;
+    the previous generation is kept for the readers that are still opening it, and the older ones are removed
+    :param data: market data indexed by timestamp, sorted ascending
+    """
+    store_dir = get_store_dir(ticker, interval)
+    # generations are named after their creation time first, so they are sorted from the oldest to the newest
+    generation = f"{time.time_ns()}_{os.getpid()}_{threading.get_ident()}"
+    generation_dir = os.path.join(store_dir, generation)
+    os.makedirs(generation_dir)
+
+    columns = {MkDataFields.TIMESTAMP: data.index.to_numpy(dtype="datetime64[ns]").view(np.int64)}
+    columns.update({field: data[field].to_numpy() for field in DATA_FIELDS})
+    for field, values in columns.items():
+        with open(_get_column_file_path(generation_dir, field), "wb") as column_file:
+            np.save(column_file, np.ascontiguousarray(values), allow_pickle=False)
+
+    try:
+        previous_generation = _read_manifest(store_dir).get(_GENERATION)
+    except ValueError:
+        previous_generation = None  # the store will point to the new generation only
+    with file_helper.atomic_write(os.path.join(store_dir, _MANIFEST_FILE_NAME), "w") as manifest_file:
+        json.dump({_GENERATION: generation, _LENGTH: len(data)}, manifest_file)
+
+    _remove_old_generations(store_dir, previous_generation or generation)
+    log.debug(f"Market data store has been saved: {generation_dir}")
+
+
+def merge_and_save(ticker: str, interval: str, data: DataFrame):
+    """
+    Adds freshly downloaded data to the store of the ticker and interval; it replaces the stored entries for the same period
+    The stored data is kept only if it overlaps the downloaded data, so the store never has gaps
+    """
+    if data.empty:
+        return
+
+    store_dir = get_store_dir(ticker, interval)
+    if os.path.isdir(store_dir):
+        try:
+            # read into memory, so the store files are not mapped while being replaced
+            stored_data = _open_store_dir(store_dir, mmap_mode=None).to_df()
+            if not stored_data.empty and stored_data.index[0] <= data.index[-1] and data.index[0] <= stored_data.index[-1]:
+                data = pd.concat([stored_data[stored_data.index < data.index[0]], data, stored_data[stored_data.index > data.index[-1]]])
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read market data store, it will be replaced: {store_dir}; error: {e}")
+
+    save(ticker, interval, data)
+
+
+def get_store_dir(ticker: str, interval: str, root_dir: str = None) -> str:
+    return os.path.join(root_dir or config.MK_DATA_STORE_DIR, mk_data_helper.get_file_name(ticker, interval))
+
+
+def _open_store_dir(store_dir: str, mmap_mode: Optional[str] = "r") -> ColumnarMkData:
+    """
+    Opens the generation of the store its manifest points to; stores saved before generations have been introduced have their files in the store directory
+    """
+    manifest = _read_manifest(store_dir)
+    if not manifest:
+        return _open_column_files(store_dir, mmap_mode)
+    return _open_column_files(os.path.join(store_dir, manifest[_GENERATION]), mmap_mode, manifest[_LENGTH])
+
+
+def _open_column_files(column_files_dir: str, mmap_mode: Optional[str] = "r", length: int = None) -> ColumnarMkData:
+    """
+    :param length: expected nr. of entries, if known
+    :raises ValueError: if the columns don't have the expected nr. of entries
+    """
+    timestamps = np.load(_get_column_file_path(column_files_dir, MkDataFields.TIMESTAMP), mmap_mode=mmap_mode, allow_pickle=False).view("datetime64[ns]")
+    columns = {field: np.load(_get_column_file_path(column_files_dir, field), mmap_mode=mmap_mode, allow_pickle=False) for field in DATA_FIELDS}
+
+    if length is not None and len(timestamps) != length:
+        raise ValueError(f"There are {len(timestamps)} timestamps, but the store manifest expects {length} entries")
+    for field, values in columns.items():
+        if len(values) != len(timestamps):
+            raise ValueError(f"Column {field} has {len(values)} entries, but there are {len(timestamps)} timestamps")
+
+    return ColumnarMkData(timestamps, columns, column_files_dir if mmap_mode else None)
+
+
+def _read_manifest(store_dir: str) -> dict:
+    """
+    :return: the generation the store points to, and its nr. of entries; empty if the store has no manifest (yet)
+    """
+    try:
+        with open(os.path.join(store_dir, _MANIFEST_FILE_NAME), "r") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def _remove_old_generations(store_dir: str, oldest_kept_generation: str):
+    """
+    Removes the generations older than the given one, and the files of the store saved before generations have been introduced;
+    files which are still opened (e.g. memory-mapped on Windows) are left to be removed by a later save
+    """
+    for entry in os.listdir(store_dir):
+        entry_path = os.path.join(store_dir, entry)
+        try:
+            if os.path.isdir(entry_path) and entry < oldest_kept_generation:
+                shutil.rmtree(entry_path)
+            elif entry.endswith(".npy"):
+                os.remove(entry_path)
+        except OSError as e:
+            log.debug(f"Could not remove old market data store files: {entry_path}; error: {e}")
+
+
+def _get_column_file_path(store_dir: str, field: str) -> str:
+    return os.path.join(store_dir, f"{field}.npy")
@@ -0,0 +1,163 @@
+import logging
+import os
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, DatetimeIndex, Timestamp
+
+from resources import config
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields, DATA_FIELDS
+from src.helper import file_helper
+from src.helper.mk_data import mk_data_helper
+
+log = logging.getLogger(__name__)
+
+_DOWNLOADED_AT = "downloaded_at"
+_FETCHED_AT = "fetched_at"
+_FETCHED_TO = "fetched_to"
+_IS_FULL_HISTORY = "is_full_history"
+
+
+class CachedMkData:
+    def __init__(self, data: DataFrame, downloaded_at: float, is_full_history: bool, fetched_at: float = None, fetched_to: Timestamp = None):
+        """
+        :param data: cached market data, sorted by timestamp
+        :param downloaded_at: time (in seconds since the epoch) of the latest download reaching the most recent data, merged into the cache
+        :param is_full_history: whether the data starts with the first entry available for the ticker
+        :param fetched_at: time (in seconds since the epoch) of the latest download extending the end of the cache; defaults to downloaded_at
+        :param fetched_to: end date of the period of that download, None if it reached the most recent data
+        """
+        self.data = data
+        self.downloaded_at = downloaded_at
+        self.is_full_history = is_full_history
+        self.fetched_at = downloaded_at if fetched_at is None else fetched_at
+        self.fetched_to = fetched_to
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.downloaded_at < config.MK_DATA_CACHE_MAX_AGE_SECONDS
+
+    def covers(self, _from: Timestamp = None, to: Timestamp = None, interval: str = intervals.DAILY) -> bool:
+        """
+        Checks whether the cache can answer a request without downloading anything:
+            - the start is covered if the cache contains the full history, or starts on/before _from
+            - the end is covered as explained by covers_end
+        :param _from: the earliest date requested, None for the full history
+        :param to: the latest date requested, None for the most recent data
+        :param interval: interval of the cached data
+        :return: True if the request can be served from the cache
+        """
+        if self.data.empty:
+            return False
+
+        start_covered = self.is_full_history or (_from is not None and _from >= self.data.index[0])
+        return start_covered and self.covers_end(to, interval)
+
+    def covers_end(self, to: Timestamp = None, interval: str = intervals.DAILY) -> bool:
+        """
+        The end is covered if the cache contains all the entries up to `to` (the whole day, see mk_data_helper.get_end_bound), or the cache is fresh (newer entries are unlikely to exist yet),
+        or the period up to `to` has already been fetched, and there can't be new entries since then:
+        either all the entries up to `to` had been published when it was fetched, or it has been fetched within the last bar interval
+        So a date after the last cached entry that has no entry (e.g. a weekend, or today's entry, which is not published yet) is not downloaded again on every request
+        """
+        if self.is_fresh():
+            return True
+        last_entry_bound = None if to is None else mk_data_helper.get_end_bound(to, interval)
+        if not self.data.empty and last_entry_bound is not None and last_entry_bound <= self.data.index[-1]:
+            return True
+
+        bar_timedelta = intervals.get_timedelta(interval)
+        fetched_at = Timestamp.fromtimestamp(self.fetched_at)
+        fetched_within_bar = time.time() - self.fetched_at < bar_timedelta.total_seconds()
+        if to is None:
+            return self.fetched_to is None and fetched_within_bar
+
+        fetched_to = fetched_at if self.fetched_to is None else self.fetched_to
+        # start of the first entry after `to`: all the entries up to `to` are published since then
+        next_entry_start = last_entry_bound + bar_timedelta
+        return to <= fetched_to and (fetched_within_bar or next_entry_start <= fetched_at)
+
+
+def load(ticker: str, interval: str) -> Optional[CachedMkData]:
+    """
+    :return: cached market data for the ticker and interval, or None if there is no (readable) cache
+    """
+    file_path = get_cache_file_path(ticker, interval)
+    if not os.path.exists(file_path):
+        return None
+
+    try:
+        with np.load(file_path, allow_pickle=False) as cache_file:
+            index = DatetimeIndex(cache_file[MkDataFields.TIMESTAMP].view("datetime64[ns]"), name=MkDataFields.TIMESTAMP)
+            data = DataFrame({field: cache_file[field] for field in DATA_FIELDS}, index=index)
+            # caches saved before the fetched period has been recorded fall back to the latest download
+            fetched_at, fetched_to = None, None
+            if _FETCHED_AT in cache_file.files:
+                fetched_at = float(cache_file[_FETCHED_AT])
+                fetched_to = cache_file[_FETCHED_TO].view("datetime64[ns]")[()]
+                fetched_to = None if np.isnat(fetched_to) else Timestamp(fetched_to)
+            return CachedMkData(data, float(cache_file[_DOWNLOADED_AT]), bool(cache_file[_IS_FULL_HISTORY]), fetched_at, fetched_to)
+    except (OSError, ValueError, KeyError) as e:
+        log.warning(f"Could not read market data cache file, it will be ignored: {file_path}; error: {e}")
+        return None
+
+
+def save(ticker: str, interval: str, cached_mk_data: CachedMkData):
+    """
+    Writes the market data to the cache file of the ticker and interval, replacing the previous one
+    The file is written atomically (see file_helper.atomic_write), so concurrent readers never see a partially written file
+    """
+    file_path = get_cache_file_path(ticker, interval)
+
+    data = cached_mk_data.data
+    columns = {field: data[field].to_numpy() for field in DATA_FIELDS}
+    with file_helper.atomic_write(file_path) as cache_file:
+        np.savez(cache_file,
+                 **{MkDataFields.TIMESTAMP: data.index.to_numpy(dtype="datetime64[ns]").view(np.int64)},
+                 **columns,
+                 **{_DOWNLOADED_AT: cached_mk_data.downloaded_at, _IS_FULL_HISTORY: cached_mk_data.is_full_history, _FETCHED_AT: cached_mk_data.fetched_at,
+                    _FETCHED_TO: np.datetime64(cached_mk_data.fetched_to or "NaT", "ns").view(np.int64)})
+
+    log.debug(f"Market data cache has been saved: {file_path}")
+
+
+def merge(cached_mk_data: Optional[CachedMkData], downloaded_data: DataFrame, is_full_history: bool, is_latest_data: bool = True,
+          fetched_to: Timestamp = None) -> CachedMkData:
+    """
+    Tops up the cached market data with freshly downloaded data; downloaded entries replace the cached ones for the same period,
+    while the cached entries before and after the downloaded period are kept
+    :param cached_mk_data: the current cache, if any
+    :param downloaded_data: freshly downloaded data
+    :param is_full_history: whether the downloaded data contains the full history of the ticker
+    :param is_latest_data: whether the downloaded data reaches the most recent data available; only then the download time of the cache is updated
+    :param fetched_to: end date of the downloaded period, if it extends the end of the cache without reaching the most recent data;
+                       the fetched period of the cache (see CachedMkData.covers_end) is updated only by downloads extending its end
+    :return: the merged cache
+    """
+    now = time.time()
+    downloaded_at = cached_mk_data.downloaded_at if cached_mk_data is not None else 0.0
+    fetched_at = cached_mk_data.fetched_at if cached_mk_data is not None else 0.0
+    if is_latest_data:
+        downloaded_at, fetched_at = now, now
+        fetched_to = None
+    elif fetched_to is not None:
+        fetched_at = now
+    elif cached_mk_data is not None:
+        fetched_to = cached_mk_data.fetched_to
+
+    if cached_mk_data is None or is_full_history:
+        return CachedMkData(downloaded_data, downloaded_at, is_full_history, fetched_at, fetched_to)
+    if downloaded_data.empty:
+        return CachedMkData(cached_mk_data.data, downloaded_at, cached_mk_data.is_full_history, fetched_at, fetched_to)
+
+    cached_data = cached_mk_data.data
+    older_cached_data = cached_data[cached_data.index < downloaded_data.index[0]]
+    newer_cached_data = cached_data[cached_data.index > downloaded_data.index[-1]]
+    data = pd.concat([older_cached_data, downloaded_data, newer_cached_data])
+    return CachedMkData(data, downloaded_at, cached_mk_data.is_full_history, fetched_at, fetched_to)
+
+
+def get_cache_file_path(ticker: str, interval: str) -> str:
+    return os.path.join(config.MK_DATA_CACHE_DIR, f"{mk_data_helper.get_file_name(ticker, interval)}.npz")
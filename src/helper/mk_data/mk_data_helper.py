@@ -0,0 +1,64 @@
+import re
+
+from pandas import DataFrame, Timestamp, Timedelta
+
+from src.constants import intervals
+from src.error.mk_data_request_error import MkDataRequestError
+
+
+def validate_timeframe(data: DataFrame, start_date: Timestamp, end_date: Timestamp) -> None:
+    if data.empty:
+        raise MkDataRequestError(f"Got no market data, while the data has been requested from '{start_date}' up to '{end_date}'")
+
+    first_available_date = data.index[0]
+    if start_date is not None and start_date < first_available_date:
+        raise MkDataRequestError(f"The first available data timestamp is '{first_available_date}', "
+                                 f"while the date has been requested from '{start_date}' (including)")
+
+    last_available_date = data.index[-1]
+    if end_date is not None and end_date > last_available_date:
+        raise MkDataRequestError(f"The last available data timestamp is '{last_available_date}', "
+                                 f"while the date has been requested for up to '{end_date}' (excluding)")
+
+
+def get_slice(full_data: DataFrame, start_date: Timestamp, end_date: Timestamp) -> DataFrame:
+    """
+    :return: the entries between start_date and end_date (inclusive, see get_end_bound); the dates don't need to have an entry (e.g. a weekend, or a night for intraday data)
+    """
+    if start_date is None and end_date is None:
+        return full_data
+
+    start_index = 0
+    if start_date is not None:
+        start_index = full_data.index.searchsorted(Timestamp(start_date), side="left")
+
+    end_index = len(full_data)
+    if end_date is not None:
+        end_index = full_data.index.searchsorted(get_end_bound(end_date), side="right")
+
+    return full_data[start_index:end_index]
+
+
+def get_end_bound(end_date: Timestamp, interval: str = None) -> Timestamp:
+    """
+    End dates are inclusive, for all intervals: an end date with a time includes the entries up to that time,
+    while an end date without a time (at midnight) includes the whole day, i.e. the daily entry of the day, or all the intraday entries of the day
+    :param interval: if given, the bound is the timestamp of the last entry of the interval up to the end date, e.g. 23:55 of the day for 5min data,
+                     so data having an entry on/after the bound contains all the entries up to the end date
+    :return: the latest timestamp an entry up to the end date may have
+    """
+    end_date = Timestamp(end_date)
+    if end_date == end_date.normalize():
+        end_date = end_date + Timedelta(days=1) - Timedelta(1, unit="ns")
+
+    if interval is not None:
+        interval_ns = intervals.get_timedelta(interval).value
+        end_date = Timestamp(end_date.value // interval_ns * interval_ns)
+    return end_date
+
+
+def get_file_name(ticker: str, interval: str) -> str:
+    """
+    :return: name of the files (or directories) with the market data of the ticker and interval, e.g. "BTCUSD_1d", safe to use on any file system
+    """
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", f"{ticker}_{interval}")
@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from src.error.mk_data_request_error import MkDataRequestError
+from src.helper import file_helper
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+log = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Token bucket limiting the rate of requests, with a daily quota on top of it
+    The bucket holds up to `burst` tokens, and is refilled continuously at `requests_per_minute` tokens per minute;
+    each request takes a token, or waits exactly as long as needed for the next token to be available
+    With burst=1, requests are evenly spaced, so there are never more than `requests_per_minute` requests in any 60 seconds
+
+    The state (tokens, and requests sent during the current day) is persisted into a file, guarded by an OS lock on a lock file,
+    so all processes using the same state file share the same limits, and the daily quota survives restarts
+    """
+    LOCK_POLL_INTERVAL_SECONDS = 0.01
+
+    def __init__(self, requests_per_minute: float, requests_per_day: int, state_file_path: str, burst: int = 1):
+        if requests_per_minute <= 0 or requests_per_day <= 0 or burst < 1:
+            raise ValueError(f"Invalid rate limits: requests_per_minute[{requests_per_minute}], requests_per_day[{requests_per_day}], burst[{burst}]")
+
+        self.requests_per_minute = requests_per_minute
+        self.requests_per_day = requests_per_day
+        self.burst = burst
+        self.state_file_path = state_file_path
+        self.lock_file_path = f"{state_file_path}.lock"
+        self._thread_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(state_file_path)), exist_ok=True)
+
+    def acquire(self):
+        """
+        Blocks until a request is allowed to be sent, and registers it
+        :raises MkDataRequestError: if the daily quota has been reached
+        """
+        while True:
+            with self._lock():
+                now = time.time()
+                state = self._get_refilled_state(now)
+
+                if state["day_requests"] >= self.requests_per_day:
+                    raise MkDataRequestError(f"Reached the daily limit of {self.requests_per_day} requests for day {state['day']} (UTC)")
+
+                if state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    state["day_requests"] += 1
+                    self._write_state(state)
+                    return
+
+                self._write_state(state)
+                wait_seconds = (1 - state["tokens"]) * 60 / self.requests_per_minute
+
+            log.debug(f"Rate limit reached, wait {wait_seconds:.2f} seconds before sending the request...")
+            time.sleep(wait_seconds)
+
+    def get_remaining_daily_requests(self) -> int:
+        with self._lock():
+            state = self._get_refilled_state(time.time())
+            return max(0, self.requests_per_day - state["day_requests"])
+
+    def _get_refilled_state(self, now: float) -> dict:
+        state = self._read_state(now)
+
+        elapsed_seconds = max(0.0, now - state["updated_at"])
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed_seconds * self.requests_per_minute / 60)
+        state["updated_at"] = now
+
+        today = time.strftime("%Y-%m-%d", time.gmtime(now))
+        if state["day"] != today:
+            state["day"] = today
+            state["day_requests"] = 0
+
+        return state
+
+    def _read_state(self, now: float) -> dict:
+        try:
+            with open(self.state_file_path, "r") as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return {"tokens": self.burst, "updated_at": now, "day": time.strftime("%Y-%m-%d", time.gmtime(now)), "day_requests": 0}
+
+    def _write_state(self, state: dict):
+        with file_helper.atomic_write(self.state_file_path, "w") as state_file:
+            json.dump(state, state_file)
+
+    @contextmanager
+    def _lock(self):
+        """
+        Locks the state for the threads of this process, and for other processes, via an exclusive OS lock on the lock file
+        The lock file is never removed, and the OS releases the lock of a process that crashes, so there are no stale locks to clean up
+        """
+        with self._thread_lock:
+            lock_file_descriptor = os.open(self.lock_file_path, os.O_CREAT | os.O_RDWR)
+            try:
+                self._lock_file(lock_file_descriptor)
+                try:
+                    yield
+                finally:
+                    self._unlock_file(lock_file_descriptor)
+            finally:
+                os.close(lock_file_descriptor)
+
+    def _lock_file(self, file_descriptor: int):
+        if os.name != "nt":
+            fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+            return
+
+        # msvcrt has no blocking lock without a timeout, so the first byte of the file is locked as soon as it's available
+        while True:
+            try:
+                msvcrt.locking(file_descriptor, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(self.LOCK_POLL_INTERVAL_SECONDS)
+
+    @staticmethod
+    def _unlock_file(file_descriptor: int):
+        if os.name != "nt":
+            fcntl.flock(file_descriptor, fcntl.LOCK_UN)
+        else:
+            os.lseek(file_descriptor, 0, os.SEEK_SET)
+            msvcrt.locking(file_descriptor, msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,59 @@
+from typing import Dict, Tuple
+
+import numpy as np
+from numpy import ndarray
+from pandas import DataFrame, DatetimeIndex
+
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields
+
+
+def resample(data: DataFrame, interval: str) -> DataFrame:
+    """
+    Builds bars of a longer interval from the bars of the data, see resample_columns
+    :param data: market data indexed by timestamp, sorted ascending
+    :param interval: interval of the resulting bars, e.g. "1d" from "15min" bars
+    :return: resampled market data, with the same columns
+    """
+    timestamps, columns = resample_columns(data.index.to_numpy(dtype="datetime64[ns]"), {field: data[field].to_numpy() for field in data.columns}, interval)
+    return DataFrame(columns, index=DatetimeIndex(timestamps, name=MkDataFields.TIMESTAMP))
+
+
+def resample_columns(timestamps: ndarray, columns: Dict[str, ndarray], interval: str) -> Tuple[ndarray, Dict[str, ndarray]]:
+    """
+    Builds bars of a longer interval from the bars of the given columns, without looping over the bars:
+    each bar of the data is assigned to the period of the interval it starts in, and each period with data becomes a bar, labeled with the start of the period
+        - open is the open of the first bar of the period, and close is the close of the last one
+        - high is the highest high, low is the lowest low, and volume is the sum of the volumes of the period
+    Periods without any bar (e.g. nights, weekends) produce no bar, and periods partially covered by the data produce bars only from the bars available
+    :param timestamps: datetime64[ns] array, sorted ascending
+    :param columns: key: data field -> value: array with a value per timestamp; fields other than OHLCV keep the last value of each period
+    :param interval: interval of the resulting bars
+    :return: tuple with the timestamps, and the columns of the resulting bars
+    """
+    if len(timestamps) == 0:
+        return timestamps, dict(columns)
+
+    period_ns = intervals.get_timedelta(interval).value
+    periods = timestamps.view(np.int64) // period_ns
+
+    # positions where each period starts, and ends (exclusive)
+    starts = np.concatenate(([0], np.flatnonzero(periods[1:] != periods[:-1]) + 1))
+    ends = np.append(starts[1:], len(periods))
+
+    resampled_columns = {}
+    for field, values in columns.items():
+        values = np.asarray(values)
+        if field == MkDataFields.OPEN:
+            resampled_columns[field] = values[starts]
+        elif field == MkDataFields.HIGH:
+            resampled_columns[field] = np.maximum.reduceat(values, starts)
+        elif field == MkDataFields.LOW:
+            resampled_columns[field] = np.minimum.reduceat(values, starts)
+        elif field == MkDataFields.VOLUME:
+            resampled_columns[field] = np.add.reduceat(values, starts)
+        else:
+            resampled_columns[field] = values[ends - 1]
+
+    resampled_timestamps = (periods[starts] * period_ns).view("datetime64[ns]")
+    return resampled_timestamps, resampled_columns
@@ -3,7 +3,8 @@ import logging
 import keras
 import numpy as np
 from keras import layers
-from pandas import DataFrame
+from numpy.lib.stride_tricks import sliding_window_view
+from pandas import DataFrame, Series
 from sklearn.metrics import accuracy_score
 
 from src.constants.mk_data_fields import MkDataFields
@@ -15,29 +16,27 @@ DIRECTION = "Direction"
 TARGET_COLUMN = DIRECTION
 
 
-def compute_model(raw_data, time_steps, test_data_split_pct, epochs):
+def compute_model(raw_data, time_steps, test_data_split_pct, epochs, initial_model=None):
+    """
+    Trains a new model on the raw data
+    :param initial_model: model to start the training from (warm start), e.g. the model trained on the data before the raw data;
+                          it's not modified, the training is done on a copy of it
+    :return: the trained model
+    """
     should_test_accuracy = True if test_data_split_pct > 0 else False
 
-    raw_data = get_clean_raw_data(raw_data)
-
-    # extract percentage changes, since what we are actually looking for is spotting patterns in price change behavior
-    data = raw_data.pct_change()
-
-    data = clean_up_data(data)
-
-    # add new column that shows whether the price will go up or down
-    add_direction_column(data)
+    data = get_features(raw_data)
 
     if should_test_accuracy:
         train_data, test_data = train_test_split(data, test_data_split_pct)
 
-        x_train, y_train = create_dataset(train_data, train_data[TARGET_COLUMN], time_steps)
-        x_test, y_test = create_dataset(test_data, test_data[TARGET_COLUMN], time_steps)
+        x_train, y_train = create_dataset(train_data, train_data[TARGET_COLUMN], time_steps, as_view=True)
+        x_test, y_test = create_dataset(test_data, test_data[TARGET_COLUMN], time_steps, as_view=True)
 
         log.debug(f"Train shapes: {x_train.shape}, {y_train.shape}")
         log.debug(f"Test shapes: {x_test.shape}, {y_test.shape}")
 
-        model = prepare_model(x_train)
+        model = prepare_model(x_train, initial_model)
         train_model(model, x_train, y_train, epochs)
 
         y_predicted = model.predict(x_test)
@@ -46,15 +45,58 @@ def compute_model(raw_data, time_steps, test_data_split_pct, epochs):
     else:
         train_data = data
 
-        x_train, y_train = create_dataset(train_data, train_data[TARGET_COLUMN], time_steps)
+        x_train, y_train = create_dataset(train_data, train_data[TARGET_COLUMN], time_steps, as_view=True)
         log.debug(f"Train shapes: {x_train.shape}, {y_train.shape}")
 
-        model = prepare_model(x_train)
+        model = prepare_model(x_train, initial_model)
         train_model(model, x_train, y_train, epochs)
 
     return model
 
 
+def get_features(raw_data: DataFrame) -> DataFrame:
+    """
+    :return: the features the models are trained on: percentage changes of the prices and volume, and the direction of the next price change
+    """
+    raw_data = get_clean_raw_data(raw_data)
+
+    # extract percentage changes, since what we are actually looking for is spotting patterns in price change behavior
+    data = raw_data.pct_change()
+
+    data = clean_up_data(data)
+
+    # add new column that shows whether the price will go up or down
+    add_direction_column(data)
+
+    return data
+
+
+def get_incremental_training_data(raw_data: DataFrame, previous_cutoff, time_steps, replay_entries) -> DataFrame:
+    """
+    Gets the raw data a model trained up to previous_cutoff should be fine-tuned on, to be up to date with the raw data:
+    the entries after previous_cutoff, plus the last `replay_entries` entries before it, so the model keeps seeing some of the older data;
+    the (time_steps + 1) entries before them are included too, so each of these entries gets a sample (with a percentage change for each time step)
+    :param raw_data: raw data up to the new cutoff date, sorted by timestamp
+    :param previous_cutoff: the last date of the data the initial model has been trained on
+    :param replay_entries: nr. of entries before previous_cutoff to train on again
+    :return: the last entries of the raw data
+    """
+    first_new_entry_index = raw_data.index.searchsorted(previous_cutoff, side="right")
+    return raw_data.iloc[max(0, first_new_entry_index - replay_entries - time_steps - 1):]
+
+
+def get_accuracy(model, raw_data: DataFrame, time_steps) -> float:
+    """
+    :return: share of the directions predicted right by the model, on all the samples of the raw data
+    """
+    data = get_features(raw_data)
+    x_test, y_test = create_dataset(data, data[TARGET_COLUMN], time_steps, as_view=True)
+
+    y_predicted = model.predict(x_test)
+    y_predicted = [0 if val < 0.5 else 1 for val in y_predicted]
+    return accuracy_score(y_test, y_predicted)
+
+
 def get_clean_raw_data(data: DataFrame):
     indexes_with_zero_volume = data.index[data[MkDataFields.VOLUME] == 0].tolist()
     if indexes_with_zero_volume:
@@ -91,18 +133,9 @@ def add_direction_column(data: DataFrame):
         0 -> the price will move down by in the next entry
     :param data: DataFrame with percentage changes of the prices, and volume
     """
-    data.insert(len(data.columns), DIRECTION, 0)  # insert new column with default value 0
-
-    close_col_index = data.columns.get_loc(MkDataFields.CLOSE)
-    direction_col_index = data.columns.get_loc(DIRECTION)
-
-    for i in range(0, len(data) - 1):
-        next_close_pct_change = data.iloc[i + 1, close_col_index]
-
-        if next_close_pct_change > 0:
-            data.iloc[i, direction_col_index] = 1  # price will go up
-        else:
-            data.iloc[i, direction_col_index] = 0  # price will stay within target or go down
+    # 1 if the price will go up, 0 if it will stay within target or go down; the last entry has no next entry, so it's 0
+    next_close_pct_changes = data[MkDataFields.CLOSE].shift(-1)
+    data.insert(len(data.columns), DIRECTION, (next_close_pct_changes > 0).to_numpy(dtype=np.int64))
 
 
 def train_test_split(data: DataFrame, test_size=0.20):
@@ -120,17 +153,38 @@ def train_test_split(data: DataFrame, test_size=0.20):
     return train_data, test_data
 
 
-def create_dataset(x, y, time_steps=1):
-    xs, ys = [], []
-    for i in range(len(x) - time_steps):
-        xv = x.iloc[i:(i + time_steps)].to_numpy()
-        xs.append(xv)
-        yv = y.iloc[i + time_steps]
-        ys.append(yv)
-    return np.array(xs), np.array(ys)
-
+def create_dataset(x: DataFrame, y: Series, time_steps=1, as_view=False):
+    """
+    Builds the samples of the data set: each sample is made of `time_steps` consecutive entries of x, labeled with the y value of the entry following them
+    The samples are a sliding window view over the values of x, so no sample is copied while building them
+    :param x: features, one row per entry
+    :param y: labels, one per entry
+    :param time_steps: nr. of entries of each sample
+    :param as_view: whether to return the samples as a read-only view over the values of x (e.g. for training), instead of copying them into a new array
+    :return: tuple with the samples, of shape (len(x) - time_steps, time_steps, nr. of features), and their labels
+    """
+    values = x.to_numpy()
+    samples_count = max(len(x) - time_steps, 0)
+    if samples_count == 0:
+        return np.empty((0, time_steps, values.shape[1]), dtype=values.dtype), y.to_numpy()[:0]
+
+    # windows of shape (samples, features, time_steps), turned into (samples, time_steps, features); the last window has no label
+    xs = sliding_window_view(values, time_steps, axis=0)[:samples_count].swapaxes(1, 2)
+    ys = y.to_numpy()[time_steps:]
+    if not as_view:
+        xs, ys = np.ascontiguousarray(xs), ys.copy()
+    return xs, ys
+
+
+def prepare_model(x_train, initial_model=None):
+    if initial_model is not None:
+        # warm start from a copy of the initial model, so the initial model can still be used as it is
+        model = keras.models.clone_model(initial_model)
+        model.build((None, x_train.shape[1], x_train.shape[2]))
+        model.set_weights(initial_model.get_weights())
+        model.compile(loss="mean_squared_error", optimizer="adam", metrics='accuracy')
+        return model
 
-def prepare_model(x_train):
     model = keras.Sequential()
     model.add(
         keras.layers.Bidirectional(
@@ -0,0 +1,156 @@
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import as_completed
+from typing import Callable, Tuple, Sequence
+
+import numpy as np
+import tensorflow as tf
+from pandas import DataFrame
+
+from resources import config
+from src.helper import ml_lstm_helper, process_pool_helper
+
+log = logging.getLogger(__name__)
+
+HITS = "hits"
+LOADS = "loads"
+MISSES = "misses"
+EVICTIONS = "evictions"
+
+# key: (ticker, time_steps, epochs, cutoff date, suffix) -> value: (model, size in bytes), from the least to the most recently used
+_models = OrderedDict()
+_stats = {HITS: 0, LOADS: 0, MISSES: 0, EVICTIONS: 0}
+_lock = threading.Lock()
+
+
+def get_model(ticker: str, time_steps: int, epochs: int, cutoff: str, compute_model: Callable, suffix: str = ""):
+    """
+    Gets the LSTM model trained on the data of the ticker up to the cutoff date, shared by all the strategies of the process:
+        - from memory, if it has already been used (hit)
+        - loaded from LSTM_MODELS_PATH, if it has already been saved (load)
+        - computed, and saved into LSTM_MODELS_PATH otherwise (miss)
+    The models in memory are evicted from the least recently used one, as soon as there are more than ML_MODEL_REGISTRY_MAX_MODELS of them,
+    or their weights take more than ML_MODEL_REGISTRY_MAX_MEMORY_MB; the model that has just been used is always kept
+    :param cutoff: the last date of the data the model is trained on, formatted as GENERAL_DATE_FORMAT
+    :param compute_model: function computing the model, if it's neither in memory nor saved
+    :param suffix: identifies the models trained differently (e.g. incrementally), which are kept apart from the other ones
+    :return: the model
+    """
+    key = (ticker, time_steps, epochs, cutoff, suffix)
+    with _lock:
+        if key in _models:
+            _models.move_to_end(key)
+            _stats[HITS] += 1
+            return _models[key][0]
+
+    model_path = get_model_path(ticker, time_steps, epochs, cutoff, suffix)
+    if os.path.exists(model_path):
+        log.info(f"Saved model found, load Model by path: {model_path}")
+        model = tf.keras.models.load_model(model_path)
+        _register(key, model, LOADS)
+        log.info(f"Model loaded")
+        return model
+
+    log.info(f"New model required, train and save model by path: {model_path}")
+    model = compute_model()
+    model.save(model_path)
+    _register(key, model, MISSES)
+    log.info(f"Model created")
+    return model
+
+
+def pretrain_models(ticker: str, time_steps: int, epochs: int, cutoffs: Sequence[str], get_raw_data: Callable[[str], DataFrame], workers: int = None):
+    """
+    Trains the models of the cutoff dates which are not saved yet, before they are needed, in parallel processes;
+    each process trains a model at a time, with a limited nr. of threads (see process_pool_helper.get_process_pool)
+    The models are trained one after another, in this process, if it's already a worker process (e.g. of a simulations sweep),
+    so the CPU cores are not oversubscribed, or if there is a single model to train
+    :param cutoffs: the cutoff dates of the models, see get_model
+    :param get_raw_data: function getting the data of the ticker up to a cutoff date; it's called once, for the latest cutoff date,
+                         and each model is trained on the entries of this data up to its own cutoff date
+    :param workers: max nr. of processes training the models; defaults to ML_PRETRAINING_WORKERS
+    """
+    missing_cutoffs = sorted(cutoff for cutoff in set(cutoffs) if not os.path.exists(get_model_path(ticker, time_steps, epochs, cutoff)))
+    if not missing_cutoffs:
+        return
+
+    log.info(f"Pre-train {len(missing_cutoffs)} models for ticker[{ticker}], time_steps[{time_steps}], epochs[{epochs}]: {missing_cutoffs}")
+    raw_data = get_raw_data(missing_cutoffs[-1])
+
+    workers = min(workers or config.ML_PRETRAINING_WORKERS or process_pool_helper.get_default_workers(), len(missing_cutoffs))
+    if workers == 1 or multiprocessing.current_process().name != "MainProcess":
+        for cutoff in missing_cutoffs:
+            get_model(ticker, time_steps, epochs, cutoff, lambda: ml_lstm_helper.compute_model(raw_data=raw_data.loc[:cutoff], time_steps=time_steps, test_data_split_pct=0, epochs=epochs))
+        return
+
+    with process_pool_helper.get_process_pool(workers) as executor:
+        futures = [executor.submit(_train_and_save_model, get_model_path(ticker, time_steps, epochs, cutoff), raw_data.loc[:cutoff], time_steps, epochs)
+                   for cutoff in missing_cutoffs]
+        for future in as_completed(futures):
+            log.info(f"Model pre-trained, and saved by path: {future.result()}")
+
+    log.info(f"Pre-trained all {len(missing_cutoffs)} models for ticker[{ticker}], time_steps[{time_steps}], epochs[{epochs}]")
+
+
+def _train_and_save_model(model_path: str, raw_data: DataFrame, time_steps: int, epochs: int) -> str:
+    model = ml_lstm_helper.compute_model(raw_data=raw_data, time_steps=time_steps, test_data_split_pct=0, epochs=epochs)
+    model.save(model_path)
+    return model_path
+
+
+def get_model_path(ticker: str, time_steps: int, epochs: int, cutoff: str, suffix: str = "") -> str:
+    model_dir_name = f"model_{ticker}_{time_steps}-steps_{epochs}-epochs_until-{cutoff}{suffix}"
+    return os.path.join(config.LSTM_MODELS_PATH, model_dir_name)
+
+
+def get_models(ticker: str, time_steps: int, epochs: int, suffix: str = "") -> "OrderedDict[str, object]":
+    """
+    :return: the models of the ticker, time steps, epochs and suffix which are in memory, by cutoff date, sorted by cutoff date
+    """
+    with _lock:
+        models = [(key[3], model) for key, (model, _) in _models.items() if key[:3] == (ticker, time_steps, epochs) and key[4] == suffix]
+    return OrderedDict(sorted(models, key=lambda cutoff_and_model: cutoff_and_model[0]))
+
+
+def get_stats() -> dict:
+    """
+    :return: nr. of hits, loads, misses, and evictions of the registry since the process started (or since clear), plus the nr. and size of the models in memory
+    """
+    with _lock:
+        return {**_stats, "models": len(_models), "memory_mb": _get_memory_usage() / 2 ** 20}
+
+
+def clear():
+    """
+    Removes all the models from memory, and resets the stats
+    """
+    with _lock:
+        _models.clear()
+        for stat in _stats:
+            _stats[stat] = 0
+
+
+def _register(key: Tuple[str, int, int, str, str], model, stat: str):
+    with _lock:
+        _stats[stat] += 1
+        _models[key] = (model, _get_model_size(model))
+        _models.move_to_end(key)
+
+        while len(_models) > 1 and (len(_models) > config.ML_MODEL_REGISTRY_MAX_MODELS or _get_memory_usage() > config.ML_MODEL_REGISTRY_MAX_MEMORY_MB * 2 ** 20):
+            evicted_key, _ = _models.popitem(last=False)
+            _stats[EVICTIONS] += 1
+            log.debug(f"Model evicted from memory: {evicted_key}")
+
+
+def _get_memory_usage() -> int:
+    return sum(size for _, size in _models.values())
+
+
+def _get_model_size(model) -> int:
+    """
+    :return: nr. of bytes of the weights of the model
+    """
+    return sum(int(np.prod(weight.shape)) * weight.dtype.size for weight in model.weights)
@@ -0,0 +1,65 @@
+from typing import Tuple
+
+import numpy as np
+from numpy import ndarray
+
+from src.model.transaction_type import SIGNAL_BUY, SIGNAL_SELL
+
+
+def get_trades(signals: ndarray, prices: ndarray, cash: float, holdings: float, transaction_fee_percent: float) -> Tuple[ndarray, ndarray, ndarray, ndarray]:
+    """
+    Computes which signals result in a trade for an all-in/all-out portfolio, and the state of the portfolio after each of them:
+        - BUY invests all cash (minus fees) into holdings, if there is any cash
+        - SELL converts all holdings (minus fees) into cash, if there are any holdings
+        - HOLD does nothing
+
+    The candidates are found in a single vectorized pass (the entries where a BUY/SELL signal differs from the previous one),
+    so only the few candidates are processed one by one, with the exact same arithmetic as SingleTickerPortfolio.register_transaction
+    :param signals: a signal (see TransactionType.to_signal) for each entry
+    :param prices: a price for each entry
+    :param cash: cash of the portfolio before the first entry
+    :param holdings: holdings of the portfolio before the first entry
+    :param transaction_fee_percent: fee paid on each trade, as a percent of the traded value
+    :return: a tuple with the indexes of the entries where a trade happened, and cash, holdings and paid fees right after each trade
+    """
+    positions = np.flatnonzero(signals)
+    if cash != 0 and holdings != 0:
+        # both the first BUY and the first SELL would trade, so every signal is a candidate
+        candidate_indexes = positions
+    else:
+        position_signals = signals[positions]
+        previous_signals = np.empty_like(position_signals)
+        previous_signals[1:] = position_signals[:-1]
+        # repeating the previous action is pointless, and so is a SELL with no holdings or a BUY with no cash at the start
+        previous_signals[:1] = SIGNAL_SELL if holdings == 0 else SIGNAL_BUY
+        candidate_indexes = positions[position_signals != previous_signals]
+
+    indexes, cash_after, holdings_after, fees = [], [], [], []
+    for index in candidate_indexes:
+        signal = signals[index]
+        price = prices[index]
+        if signal == SIGNAL_BUY:
+            if cash == 0:
+                continue
+
+            fee = cash / 100 * transaction_fee_percent
+            holdings += ((cash - fee) / price)
+            cash = 0
+        elif signal == SIGNAL_SELL:
+            if holdings == 0:
+                continue
+
+            holdings_value = holdings * price
+            fee = holdings_value / 100 * transaction_fee_percent
+            cash += holdings_value - fee
+            holdings = 0
+        else:
+            raise ValueError(f"Unknown signal: {signal}")
+
+        indexes.append(index)
+        cash_after.append(cash)
+        holdings_after.append(holdings)
+        fees.append(fee)
+
+    return (np.array(indexes, dtype=np.int64), np.array(cash_after, dtype=np.float64),
+            np.array(holdings_after, dtype=np.float64), np.array(fees, dtype=np.float64))
@@ -0,0 +1,58 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import tensorflow as tf
+
+from resources import config
+
+log = logging.getLogger(__name__)
+
+# read by the BLAS/OpenMP libraries (used by numpy and tensorflow) when they are loaded, to size their thread pools
+THREADS_ENV_VARS = ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]
+
+
+def get_default_workers() -> int:
+    """
+    :return: nr. of worker processes: one per CPU core, each with PROCESS_POOL_WORKER_THREADS threads, see get_process_pool
+    """
+    return os.cpu_count() or 1
+
+
+@contextmanager
+def get_process_pool(workers: int, initializer: Callable = None, initargs: tuple = ()) -> Iterator[ProcessPoolExecutor]:
+    """
+    Pool of processes for the CPU heavy work (simulations, training of LSTM models):
+        - tensorflow is not fork-safe, so the workers are started from scratch (spawn), instead of being forked from this process,
+          and get their arguments (and the initializer's) pickled
+        - each worker uses at most PROCESS_POOL_WORKER_THREADS threads for tensorflow and BLAS, so a worker per CPU core does not oversubscribe them
+    :param workers: nr. of worker processes
+    :param initializer: function called in each worker when it starts, with initargs
+    :return: the pool, which is shut down when the context is left
+    """
+    threads = config.PROCESS_POOL_WORKER_THREADS
+
+    # the workers inherit the environment while the pool is running, while this process keeps the thread pools it has already loaded
+    previous_env = {var: os.environ.get(var) for var in THREADS_ENV_VARS}
+    os.environ.update({var: str(threads) for var in THREADS_ENV_VARS})
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker, initargs=(threads, initializer, initargs)) as executor:
+            yield executor
+    finally:
+        for var, value in previous_env.items():
+            if value is None:
+                os.environ.pop(var, None)
+            else:
+                os.environ[var] = value
+
+
+def _init_worker(threads: int, initializer: Callable, initargs: tuple):
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+    if initializer is not None:
+        initializer(*initargs)
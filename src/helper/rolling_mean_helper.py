@@ -0,0 +1,89 @@
+from typing import Sequence
+
+import numpy as np
+from numpy import ndarray
+
+from src.model.transaction_type import SIGNAL_BUY, SIGNAL_SELL, SIGNAL_HOLD
+
+_EPS = np.finfo(np.float64).eps
+
+
+def get_prefix_sums(values: ndarray) -> ndarray:
+    """
+    :param values: 1D array of values
+    :return: array of length len(values) + 1, where entry i is the sum of the first i values
+    """
+    result = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=result[1:])
+    return result
+
+
+def get_mean_signals(values: ndarray, mean_period: int) -> ndarray:
+    """
+    Same as get_mean_signals_by_mean_period, but for a single mean period
+    :return: 1D array of signals, one per value
+    """
+    return get_mean_signals_by_mean_period(values, [mean_period])[0]
+
+
+def get_mean_signals_by_mean_period(values: ndarray, mean_periods: Sequence[int]) -> ndarray:
+    """
+    Compares each value to the mean of the last `mean_period` values (including itself), for every mean period at once;
+    the means are computed from shared prefix sums, so the whole matrix is built in O(len(mean_periods) * len(values))
+
+    The signals are exactly the same as comparing each value to pandas' mean of the window:
+    prefix sums accumulate rounding errors, so the values that are too close to the mean to be decided
+    with certainty are compared again with the mean computed directly on their window
+    :param values: 1D array of values, e.g. close prices; must not contain NaNs
+    :param mean_periods: the lengths of the windows the mean should be computed on
+    :return: 2D int8 array of shape (len(mean_periods), len(values)) with the signals:
+             BUY if the value is higher than the mean, SELL if it's lower, and HOLD if it's equal;
+             entries that don't have enough previous values to compute the mean are HOLD
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values_length = len(values)
+
+    prefix_sums = get_prefix_sums(values)
+    prefix_abs_sums = get_prefix_sums(np.abs(values))
+    # upper bound of the rounding error accumulated by each prefix sum
+    prefix_sums_errors = np.arange(values_length + 1) * _EPS * prefix_abs_sums
+
+    result = np.full((len(mean_periods), values_length), SIGNAL_HOLD, dtype=np.int8)
+    for row, mean_period in enumerate(mean_periods):
+        if mean_period < 1:
+            raise ValueError(f"Mean period must be a positive number, but got: {mean_period}")
+        if mean_period > values_length:
+            continue
+
+        # windows are [end - mean_period, end) in terms of prefix sums indexes
+        ends = np.arange(mean_period, values_length + 1)
+        starts = ends - mean_period
+
+        means = (prefix_sums[ends] - prefix_sums[starts]) / mean_period
+        last_values = values[ends - 1]
+        differences = last_values - means
+
+        # error of the prefix sums based mean, plus the error of the mean computed directly on the window, doubled for safety
+        window_abs_sums = prefix_abs_sums[ends] - prefix_abs_sums[starts]
+        tolerances = 2 * ((prefix_sums_errors[ends] + prefix_sums_errors[starts]) / mean_period + _EPS * window_abs_sums + 2 * _EPS * np.abs(means))
+
+        signals = result[row, mean_period - 1:]
+        signals[differences > 0] = SIGNAL_BUY
+        signals[differences < 0] = SIGNAL_SELL
+
+        for position in np.flatnonzero(np.abs(differences) <= tolerances):
+            end = ends[position]
+            signals[position] = _get_mean_signal(values[end - mean_period:end])
+
+    return result
+
+
+def _get_mean_signal(window: ndarray) -> int:
+    mean = window.sum() / len(window)
+    last_value = window[-1]
+    if last_value > mean:
+        return SIGNAL_BUY
+    elif last_value < mean:
+        return SIGNAL_SELL
+    else:
+        return SIGNAL_HOLD
@@ -0,0 +1,36 @@
+import logging
+from typing import Optional
+
+from pandas import DataFrame, Timestamp
+
+from resources import config
+from src.helper.mk_data import av_crypto_helper, columnar_store
+from src.helper.mk_data.columnar_store import ColumnarMkData
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+
+
+class AlphaVantageMkDataProvider(IMkDataProvider):
+    """
+    Downloads the data from Alpha Vantage (see av_crypto_helper)
+    If MK_DATA_STORE_ENABLED, downloaded data is also kept in the columnar store, which is used instead of downloading the data when it covers the period
+    """
+    log = logging.getLogger(__name__)
+
+    def get_name(self) -> str:
+        return "AlphaVantageMkDataProvider"
+
+    def get_historical_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+        data = av_crypto_helper.download_historical_data(ticker, interval, _from=_from, to=to)
+        if config.MK_DATA_STORE_ENABLED:
+            columnar_store.merge_and_save(ticker, interval, data)
+
+        return data
+
+    def get_columnar_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> Optional[ColumnarMkData]:
+        if not config.MK_DATA_STORE_ENABLED:
+            return None
+
+        columnar_data = columnar_store.get_covering_slice(ticker, interval, _from, to)
+        if columnar_data is not None:
+            self.log.info(f"Open market data for ticker[{ticker}] from the columnar store")
+        return columnar_data
@@ -0,0 +1,57 @@
+import logging
+from typing import Optional
+
+import numpy as np
+from pandas import DataFrame, Timestamp
+
+from resources import config
+from src.constants import intervals
+from src.error.mk_data_request_error import MkDataRequestError
+from src.helper.mk_data import columnar_store, resampler, mk_data_helper
+from src.helper.mk_data.columnar_store import ColumnarMkData
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+
+
+class ColumnarStoreMkDataProvider(IMkDataProvider):
+    """
+    Reads the data only from the local columnar store (see columnar_store), memory-mapped, without downloading anything
+    If the store of an interval does not cover the period, the data is resampled from the store of a shorter interval, if any covers it
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self, store_dir: str = None):
+        """
+        :param store_dir: directory with the stores of all tickers; defaults to MK_DATA_STORE_DIR
+        """
+        self.store_dir = store_dir or config.MK_DATA_STORE_DIR
+
+    def get_name(self) -> str:
+        return f"ColumnarStoreMkDataProvider(store_dir={self.store_dir})"
+
+    def get_historical_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+        return self.get_columnar_data(ticker, interval, _from, to).to_df()
+
+    def get_columnar_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> ColumnarMkData:
+        columnar_data = columnar_store.get_covering_slice(ticker, interval, _from, to, self.store_dir)
+        if columnar_data is None:
+            columnar_data = self._get_resampled_columnar_data(ticker, interval, _from, to)
+        if columnar_data is None:
+            raise MkDataRequestError(f"The columnar store does not cover ticker[{ticker}] and interval[{interval}] from '{_from}' to '{to}' (including): "
+                                     f"{columnar_store.get_store_dir(ticker, interval, self.store_dir)}")
+        return columnar_data
+
+    def _get_resampled_columnar_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> Optional[ColumnarMkData]:
+        for finer_interval in intervals.get_finer_intervals(interval):
+            finer_data = columnar_store.get_covering_slice(ticker, finer_interval, _from, None, self.store_dir)
+            if finer_data is None or (to is not None and mk_data_helper.get_end_bound(to, finer_interval) > Timestamp(finer_data.timestamps[-1])):
+                continue
+
+            self.log.info(f"Resample the {finer_interval} market data of ticker[{ticker}] from the columnar store into {interval} data")
+            if to is not None:
+                # include all the entries of the period of the end date (see mk_data_helper.get_end_bound), up to the start of the next period
+                next_period_start = mk_data_helper.get_end_bound(to, interval) + intervals.get_timedelta(interval)
+                finer_data = finer_data.slice_positions(0, int(np.searchsorted(finer_data.timestamps, next_period_start.to_datetime64(), side="left")))
+            timestamps, columns = resampler.resample_columns(finer_data.timestamps, finer_data.columns, interval)
+            return ColumnarMkData(timestamps, columns)
+
+        return None
@@ -0,0 +1,50 @@
+import logging
+import os
+
+from pandas import DataFrame, Timestamp
+
+from src.constants import intervals
+from src.error.mk_data_request_error import MkDataRequestError
+from src.helper.mk_data import av_crypto_helper, mk_data_helper, resampler
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+
+
+class CsvDirMkDataProvider(IMkDataProvider):
+    """
+    Reads the data from a local directory with a CSV file per ticker and interval, named "<ticker>_<interval>.csv" (e.g. "BTCUSD_1d.csv")
+    Files have the same format as Alpha Vantage CSV responses: timestamp,open,high,low,close,volume
+    If there is no file for an interval, the data is resampled from the file of a shorter interval, if any (e.g. "1d" from "BTCUSD_15min.csv")
+    """
+    log = logging.getLogger(__name__)
+
+    def __init__(self, mk_data_dir: str):
+        if not mk_data_dir or not os.path.isdir(mk_data_dir):
+            raise MkDataRequestError(f"Market data directory does not exist: {mk_data_dir}")
+
+        self.mk_data_dir = mk_data_dir
+
+    def get_name(self) -> str:
+        return f"CsvDirMkDataProvider(mk_data_dir={self.mk_data_dir})"
+
+    def get_historical_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+        data = self._read_data(ticker, interval)
+
+        mk_data_helper.validate_timeframe(data, _from, to)
+        return mk_data_helper.get_slice(data, _from, to)
+
+    def _read_data(self, ticker: str, interval: str) -> DataFrame:
+        file_path = self.get_file_path(ticker, interval)
+        if os.path.isfile(file_path):
+            self.log.debug(f"Read market data from file: {file_path}")
+            return av_crypto_helper.av_csv_to_df(file_path)
+
+        for finer_interval in intervals.get_finer_intervals(interval):
+            finer_file_path = self.get_file_path(ticker, finer_interval)
+            if os.path.isfile(finer_file_path):
+                self.log.info(f"There is no {interval} market data file for ticker[{ticker}], resample the {finer_interval} data from file: {finer_file_path}")
+                return resampler.resample(av_crypto_helper.av_csv_to_df(finer_file_path), interval)
+
+        raise MkDataRequestError(f"There is no market data file for ticker[{ticker}] and interval[{interval}] (or a shorter interval): {file_path}")
+
+    def get_file_path(self, ticker: str, interval: str) -> str:
+        return os.path.join(self.mk_data_dir, f"{mk_data_helper.get_file_name(ticker, interval)}.csv")
@@ -0,0 +1,39 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from pandas import DataFrame, Timestamp
+
+from src.helper.mk_data.columnar_store import ColumnarMkData
+
+"""
+Interface of the sources market data is taken from, so simulations and strategies don't depend on a specific source
+"""
+
+
+class IMkDataProvider(ABC):
+    @abstractmethod
+    def get_name(self) -> str:
+        """
+        :return: Readable name of the provider
+        """
+        pass
+
+    @abstractmethod
+    def get_historical_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+        """
+        :param ticker: ticker (e.g., symbol) for which the data should be provided
+        :param interval: time interval represented by each entry, e.g. "1d"
+        :param _from: the earliest date for which the data should be included (included into result), None for the full history
+        :param to: the latest date for which the data should be included (included into result, the whole day if it has no time,
+                   see mk_data_helper.get_end_bound), None for the most recent data
+        :return: historical data for the given ticker and period, indexed by MkDataFields.TIMESTAMP, sorted ascending
+        :raises MkDataRequestError: if the data does not cover the '_from' or 'to' dates
+        """
+        pass
+
+    def get_columnar_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> Optional[ColumnarMkData]:
+        """
+        Optional counterpart of get_historical_data, for providers that can give the data without building a DataFrame (e.g. memory-mapped)
+        :return: same data as get_historical_data, or None if the provider can't give it in columnar form
+        """
+        return None
@@ -0,0 +1,19 @@
+from src.mk_data_provider.impl.alpha_vantage_mk_data_provider import AlphaVantageMkDataProvider
+from src.mk_data_provider.impl.columnar_store_mk_data_provider import ColumnarStoreMkDataProvider
+from src.mk_data_provider.impl.csv_dir_mk_data_provider import CsvDirMkDataProvider
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+
+
+def get_concrete_mk_data_provider(mk_data_provider_type=None, mk_data_path=None) -> IMkDataProvider:
+    """
+    :param mk_data_provider_type: type of the provider, defaults to AlphaVantageMkDataProvider
+    :param mk_data_path: local path the provider reads the data from, for providers that read local files
+    """
+    if mk_data_provider_type is None or mk_data_provider_type == AlphaVantageMkDataProvider:
+        return AlphaVantageMkDataProvider()
+    elif mk_data_provider_type == CsvDirMkDataProvider:
+        return CsvDirMkDataProvider(mk_data_path)
+    elif mk_data_provider_type == ColumnarStoreMkDataProvider:
+        return ColumnarStoreMkDataProvider(mk_data_path)
+    else:
+        raise NotImplementedError(f"No such market data provider: {mk_data_provider_type}")
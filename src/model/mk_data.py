@@ -1,14 +1,32 @@
+import copy
 import logging
 
 import numpy
+from numpy import ndarray
 from pandas import DataFrame
 
+from resources import config
 from src.constants.mk_data_fields import MkDataFields
 from src.error.mk_data_format_error import MkDataFormatError
 from src.helper import formatter
+from src.helper.mk_data import mk_data_helper
+from src.helper.mk_data.columnar_store import ColumnarMkData
 from pandas import Timestamp
 
 class MkData:
+    """
+    Market data of a ticker, for a period and interval
+
+    In compact mode (see MK_DATA_COMPACT_DTYPES), the prices and the volume are kept as float32 instead of float64/int64, which halves the memory of the data
+    Precision bound: float32 keeps 24 significant bits, so each price is rounded with a relative error of at most 2^-24 (~6e-8),
+    and volumes up to 2^24 are exact; the value of a portfolio is a product of price ratios (one factor per transaction, plus the final price),
+    so the end value, and the performance computed from it, differ from the float64 ones by a relative error of at most ~(2 * nr. of transactions + 2) * 6e-8,
+    e.g. at most ~0.0012% of the end value for 100 transactions; strategies comparing prices that are within this error may give different advices
+    Compact dtypes are applied once, when the market data is created, on a copy of the given data, so `data` and get_values return the same dtypes;
+    memory-mapped columnar data is read into memory to be converted, and converted again after being sent to another process (see __setstate__)
+    """
+    log = logging.getLogger(__name__)
+
     DATA_COLUMNS_TO_DTYPES = {
         MkDataFields.TIMESTAMP: numpy.datetime64,
         MkDataFields.OPEN: numpy.float64,
@@ -17,19 +35,191 @@ class MkData:
         MkDataFields.CLOSE: numpy.float64,
         MkDataFields.VOLUME: numpy.int64
     }
+    COMPACT_DATA_COLUMNS_TO_DTYPES = {
+        MkDataFields.TIMESTAMP: numpy.datetime64,
+        MkDataFields.OPEN: numpy.float32,
+        MkDataFields.HIGH: numpy.float32,
+        MkDataFields.LOW: numpy.float32,
+        MkDataFields.CLOSE: numpy.float32,
+        MkDataFields.VOLUME: numpy.float32
+    }
+
+    def __init__(self, ticker: str, start_date: Timestamp, end_date: Timestamp, interval: str, data: DataFrame = None, columnar_data: ColumnarMkData = None,
+                 compact: bool = None):
+        """
+        Market data is given either as a DataFrame, or as columnar data (e.g. memory-mapped from a store);
+        columnar data is turned into a DataFrame only when `data` is accessed
+        :param compact: whether to keep the data with compact dtypes, see the class docs; defaults to MK_DATA_COMPACT_DTYPES
+        """
+        if (data is None) == (columnar_data is None):
+            raise ValueError("Expected exactly one of data and columnar_data")
 
-    def __init__(self, ticker: str, start_date: Timestamp, end_date: Timestamp, interval: str, data: DataFrame):
-        self.log = logging.getLogger(__name__)
         self.ticker = ticker
         self.start_date = start_date
         self.end_date = end_date
         self.interval = interval
-        self.data = data
+        self._data = data
+        self._columnar_data = columnar_data
+        self._timestamps = None
+        self.compact = config.MK_DATA_COMPACT_DTYPES if compact is None else compact
         self._validate_data()
 
-        self.log.info(f"{self.__str__()} has been successfully initialized with {len(data)} data points")
+        if self.compact:
+            self._convert_to_compact_dtypes()
+
+        self.log.info(f"{self.__str__()} has been successfully initialized with {len(self)} data points, using {self.get_memory_usage() / 2 ** 20:.2f} MB")
+
+    @property
+    def data(self) -> DataFrame:
+        if self._data is None:
+            self._data = self._columnar_data.to_df()
+        return self._data
+
+    @data.setter
+    def data(self, data: DataFrame):
+        self._data = data
+        self._columnar_data = None
+        self._timestamps = None
+
+    @property
+    def timestamps(self) -> ndarray:
+        """
+        Timestamp -> position index of the market data: the timestamps of the entries as a sorted datetime64[ns] array,
+        computed once, so dates are located by binary search (see get_position), without going through the DataFrame index
+        """
+        if self._columnar_data is not None:
+            return self._columnar_data.timestamps
+        if self._timestamps is None:
+            self._timestamps = self._data.index.to_numpy(dtype="datetime64[ns]")
+        return self._timestamps
+
+    def get_position(self, date: Timestamp, side: str = "left") -> int:
+        """
+        :param date: any date; it does not need to have an entry (e.g. a weekend, or a night for intraday data)
+        :param side: "left" for the position of the first entry on or after the date, "right" for the first entry after it
+        :return: position of the entry, or the nr. of entries if there is no such entry
+        """
+        return int(numpy.searchsorted(self.timestamps, Timestamp(date).to_datetime64(), side=side))
+
+    def get_asof_position(self, date: Timestamp) -> int:
+        """
+        :return: position of the last entry on or before the date, or -1 if there is no such entry
+        """
+        return self.get_position(date, side="right") - 1
+
+    def get_start_position(self) -> int:
+        """
+        :return: position of the first entry on or after the start date, i.e. the first entry to be simulated
+        """
+        return self.get_position(self.start_date)
+
+    def get_end_position(self) -> int:
+        """
+        :return: position of the last entry up to the end date (the whole day, if it has no time, see mk_data_helper.get_end_bound), i.e. the last entry to be simulated
+        """
+        return self.get_asof_position(mk_data_helper.get_end_bound(self.end_date))
+
+    def get_start_close_price(self) -> float:
+        """
+        :return: close price of the first entry on or after the start date (e.g. the first bar of the day, for intraday data)
+        """
+        return self.get_values(MkDataFields.CLOSE)[self.get_start_position()]
+
+    def get_end_close_price(self) -> float:
+        """
+        :return: close price of the last entry up to the end date, see get_end_position
+        """
+        return self.get_values(MkDataFields.CLOSE)[self.get_end_position()]
+
+    def get_values(self, field: str) -> ndarray:
+        """
+        :param field: a data field, or MkDataFields.TIMESTAMP
+        :return: the values of the field; columnar data is returned without being copied, or turned into a DataFrame
+        """
+        if field == MkDataFields.TIMESTAMP:
+            return self.timestamps
+        if self._columnar_data is not None:
+            return self._columnar_data.get_values(field)
+        return self._data[field].to_numpy()
+
+    def truncate(self, before: Timestamp = None, after: Timestamp = None) -> "MkData":
+        """
+        Same as DataFrame.truncate, for market data; the dates don't need to have an entry, see slice
+        :return: a copy of this market data, keeping only the entries between before and after (inclusive, the whole day if after has no time, see mk_data_helper.get_end_bound)
+        """
+        start = 0 if before is None else self.get_position(before)
+        end = None if after is None else self.get_position(mk_data_helper.get_end_bound(after), side="right")
+        return self.slice(start, end)
+
+    def slice(self, start: int = 0, end: int = None) -> "MkData":
+        """
+        Slices the market data by position, without parsing any date: the data is sliced into views, without copying it
+        Columnar data keeps the DataFrame built from it (if any) sliced as well, so slices of the same data share it, instead of building their own
+        :param start: position of the first entry to keep (inclusive)
+        :param end: position of the last entry to keep (exclusive), None to keep all the entries up to the end
+        :return: a copy of this market data, keeping only the entries between start and end
+        """
+        sliced_mk_data = copy.copy(self)
+        if self._columnar_data is not None:
+            sliced_mk_data._columnar_data = self._columnar_data.slice_positions(start, end)
+        if self._data is not None:
+            sliced_mk_data._data = self._data.iloc[start:end]
+        if self._timestamps is not None:
+            sliced_mk_data._timestamps = self._timestamps[start:end]
+        return sliced_mk_data
+
+    def get_memory_usage(self) -> int:
+        """
+        :return: nr. of bytes of memory held by the data: the DataFrame (including its index), if any, and the columnar arrays that are not memory-mapped
+        """
+        memory_usage = 0
+        if self._data is not None:
+            memory_usage += int(self._data.memory_usage(index=True, deep=True).sum())
+        if self._columnar_data is not None:
+            arrays = [self._columnar_data.timestamps, *self._columnar_data.columns.values()]
+            memory_usage += sum(values.nbytes for values in arrays if not isinstance(values, numpy.memmap))
+        return memory_usage
+
+    def __len__(self):
+        return len(self._columnar_data) if self._columnar_data is not None else len(self._data)
+
+    def __getstate__(self):
+        # data mapped to a store is sent to other processes as a reference to the store (see ColumnarMkData), without the DataFrame built from it
+        state = self.__dict__.copy()
+        if self._columnar_data is not None and self._columnar_data.store_dir is not None:
+            state["_data"] = None
+            state["_timestamps"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # data mapped to a store is mapped again as it is stored (see ColumnarMkData), so it's converted again
+        if self.compact and self._columnar_data is not None and self._columnar_data.store_dir is not None:
+            self._convert_to_compact_dtypes()
+
+    def _convert_to_compact_dtypes(self):
+        """
+        Converts the data to compact dtypes, on a copy: the DataFrame or columnar data given to the constructor is left as it is
+        """
+        if self._columnar_data is not None:
+            columnar_data = self._columnar_data
+            # the memory-mapped arrays are read into plain arrays, which are not mistaken for memory-mapped ones, see get_memory_usage
+            columns = {field: numpy.asarray(values).astype(MkData.COMPACT_DATA_COLUMNS_TO_DTYPES.get(field, values.dtype))
+                       for field, values in columnar_data.columns.items()}
+            self._columnar_data = ColumnarMkData(columnar_data.timestamps, columns, columnar_data.store_dir, columnar_data.start)
+            return
+
+        self._data = MkData._get_compact_df(self._data)
+
+    @staticmethod
+    def _get_compact_df(data: DataFrame) -> DataFrame:
+        return data.astype({column_name: dtype for column_name, dtype in MkData.COMPACT_DATA_COLUMNS_TO_DTYPES.items() if column_name in data.columns})
 
     def _validate_data(self):
+        if self._columnar_data is not None:
+            self._validate_columnar_data()
+            return
+
         if self.data.empty:
             raise MkDataFormatError("Data is empty!\n"
                                     f"{self}")
@@ -49,5 +239,14 @@ class MkData:
             if column_name != MkDataFields.TIMESTAMP and column_name not in actual_column_to_dtypes:
                 raise MkDataFormatError(f"Could not find {column_name} in market data df: {actual_columns}")
 
+    def _validate_columnar_data(self):
+        if self._columnar_data.empty:
+            raise MkDataFormatError("Data is empty!\n"
+                                    f"{self}")
+
+        for column_name in MkData.DATA_COLUMNS_TO_DTYPES:
+            if column_name != MkDataFields.TIMESTAMP and column_name not in self._columnar_data.columns:
+                raise MkDataFormatError(f"Could not find {column_name} in columnar market data: {list(self._columnar_data.columns)}")
+
     def __str__(self):
-        return formatter.obj_to_str(self, ['log', 'data'])
+        return formatter.obj_to_str(self, ['_data', '_columnar_data', '_timestamps'])
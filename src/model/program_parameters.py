@@ -7,7 +7,10 @@ class ProgramParameters:
                  strategy_type: type,  # strategy that needs to be simulated
                  simulate_strategy: bool, find_best_performance: bool,  # simulation type
                  print_results: bool, plot_results: bool, calculate_over_market_performance: bool,  # results reporting setup
-                 subset_data_length: int, min_subset_data_length: int, max_subset_data_length: int  # simulation setup
+                 subset_data_length: int, min_subset_data_length: int, max_subset_data_length: int,  # simulation setup
+                 workers: int = None,  # parallelization setup
+                 mk_data_provider_type: type = None, mk_data_path: str = None,  # mkdata source setup
+                 compact_mk_data: bool = False  # mkdata memory setup
                  ):
         self.start_date = start_date
         self.end_date = end_date
@@ -22,3 +25,7 @@ class ProgramParameters:
         self.subset_data_length = subset_data_length
         self.min_subset_data_length = min_subset_data_length
         self.max_subset_data_length = max_subset_data_length
+        self.workers = workers
+        self.mk_data_provider_type = mk_data_provider_type
+        self.mk_data_path = mk_data_path
+        self.compact_mk_data = compact_mk_data
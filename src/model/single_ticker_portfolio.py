@@ -1,7 +1,11 @@
 import logging
+from typing import Sequence
+
+from numpy import ndarray
 
 from src.constants import statistics_fields
-from src.model.transaction import Transaction
+from src.helper import portfolio_helper
+from src.model.transaction_log import TransactionLog
 from src.model.transaction_type import TransactionType
 
 
@@ -17,7 +21,7 @@ class SingleTickerPortfolio:
         self.holdings: float = 0
         self.transaction_fee_percent = transaction_fee_percent
         self.paid_fees: float = 0
-        self.transactions = []
+        self.transactions = TransactionLog()
         self.log_transactions = log_transactions
 
     def register_transaction(self, timestamp: str, price: float, transaction_type: TransactionType, details: dict) -> bool:
@@ -40,6 +44,37 @@ class SingleTickerPortfolio:
         else:
             raise ValueError(f"Unknown TransactionType: {transaction_type}")
 
+    def register_signals(self, timestamps: Sequence, prices: ndarray, signals: ndarray, details: Sequence[dict] = None, first_index: int = 0):
+        """
+        Registers the transactions of a whole vector of signals at once, with the same result as calling
+        register_transaction for each of them, but without processing the signals that don't change the portfolio
+        If transactions logging is enabled, each signal is registered separately, so that all of them are logged
+
+        :param timestamps: timestamp of each entry
+        :param prices: price of each entry
+        :param signals: signal (see TransactionType.to_signal) of each entry
+        :param details: details of each entry's signal, if any; only the details of the resulted transactions are accessed
+        :param first_index: index of the first entry to register, the previous ones are ignored
+        """
+        if self.log_transactions:
+            for index in range(first_index, len(signals)):
+                transaction_details = details[index] if details is not None else {}
+                self.register_transaction(timestamps[index], prices[index], TransactionType.from_signal(signals[index]), transaction_details)
+            return
+
+        indexes, cash_after, holdings_after, fees = portfolio_helper.get_trades(signals[first_index:], prices[first_index:], self.cash, self.holdings,
+                                                                                self.transaction_fee_percent)
+        if len(indexes) == 0:
+            return
+
+        indexes += first_index
+        self.cash = cash_after[-1]
+        self.holdings = holdings_after[-1]
+        for fee in fees:
+            self.paid_fees += fee
+
+        self.transactions.extend(timestamps[indexes], signals[indexes], prices[indexes], cash_after, holdings_after, details, indexes)
+
     def _register_buy(self, timestamp, price, details) -> bool:
         if self.cash == 0:
             if self.log_transactions:
@@ -52,12 +87,10 @@ class SingleTickerPortfolio:
         self.paid_fees += fees
         self.cash = 0
 
-        statistics = self._get_transaction_statistics(details)
-        transaction = Transaction(TransactionType.BUY, timestamp, price, statistics)
-        self.transactions.append(transaction)
+        self.transactions.append(TransactionType.BUY, timestamp, price, self.cash, self.holdings, details)
 
         if self.log_transactions:
-            SingleTickerPortfolio.log.info(transaction)
+            SingleTickerPortfolio.log.info(self.transactions[-1])
 
         return True
 
@@ -74,12 +107,10 @@ class SingleTickerPortfolio:
         self.paid_fees += fees
         self.holdings = 0
 
-        statistics = self._get_transaction_statistics(details)
-        transaction = Transaction(TransactionType.SELL, timestamp, price, statistics)
-        self.transactions.append(transaction)
+        self.transactions.append(TransactionType.SELL, timestamp, price, self.cash, self.holdings, details)
 
         if self.log_transactions:
-            SingleTickerPortfolio.log.info(transaction)
+            SingleTickerPortfolio.log.info(self.transactions[-1])
 
         return True
 
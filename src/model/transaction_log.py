@@ -0,0 +1,150 @@
+from typing import Sequence
+
+import numpy as np
+from numpy import ndarray
+from pandas import Timestamp
+
+from src.constants import statistics_fields
+from src.model.transaction import Transaction
+from src.model.transaction_type import TransactionType
+
+
+class TransactionLog:
+    """
+    Transactions of a portfolio stored column by column, in a contiguous array per field, instead of a Transaction object per transaction
+    Transaction details are kept either as they have been registered, or as a reference to a sequence of details,
+    in which case they are materialized only when the transaction is accessed
+
+    Iterating over the log, or accessing it by index, yields Transaction objects, same as a list of transactions would
+    """
+    INITIAL_CAPACITY = 16
+
+    def __init__(self):
+        self._size = 0
+        self._timestamps = np.empty(self.INITIAL_CAPACITY, dtype="datetime64[ns]")
+        self._type_codes = np.empty(self.INITIAL_CAPACITY, dtype=np.int8)
+        self._prices = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._cash = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._holdings = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        # for each transaction: None if there are no details, a dict, or a (details sequence, index) reference
+        self._details = []
+
+    @property
+    def timestamps(self) -> ndarray:
+        return self._timestamps[:self._size]
+
+    @property
+    def type_codes(self) -> ndarray:
+        """
+        :return: transaction types as signals (see TransactionType.to_signal)
+        """
+        return self._type_codes[:self._size]
+
+    @property
+    def prices(self) -> ndarray:
+        return self._prices[:self._size]
+
+    @property
+    def cash(self) -> ndarray:
+        """
+        :return: cash of the portfolio right after each transaction
+        """
+        return self._cash[:self._size]
+
+    @property
+    def holdings(self) -> ndarray:
+        """
+        :return: holdings of the portfolio right after each transaction
+        """
+        return self._holdings[:self._size]
+
+    def append(self, transaction_type: TransactionType, timestamp, price: float, cash: float, holdings: float, details: dict = None):
+        """
+        Adds a single transaction to the log
+        :param transaction_type: BUY or SELL
+        :param timestamp: timestamp of the transaction
+        :param price: price of the transaction
+        :param cash: cash of the portfolio right after the transaction
+        :param holdings: holdings of the portfolio right after the transaction
+        :param details: details of the transaction, if any
+        """
+        self._ensure_capacity(self._size + 1)
+
+        self._timestamps[self._size] = Timestamp(timestamp).to_datetime64()
+        self._type_codes[self._size] = transaction_type.to_signal()
+        self._prices[self._size] = price
+        self._cash[self._size] = cash
+        self._holdings[self._size] = holdings
+        self._details.append(details if details else None)
+        self._size += 1
+
+    def extend(self, timestamps, type_codes: ndarray, prices: ndarray, cash: ndarray, holdings: ndarray,
+               details: Sequence[dict] = None, details_indexes: ndarray = None):
+        """
+        Adds multiple transactions to the log, each parameter having a value per transaction
+        :param details: a sequence with details, which is accessed only when a transaction is materialized
+        :param details_indexes: index within the details sequence of each transaction's details
+        """
+        count = len(type_codes)
+        self._ensure_capacity(self._size + count)
+
+        end = self._size + count
+        self._timestamps[self._size:end] = np.asarray(timestamps, dtype="datetime64[ns]")
+        self._type_codes[self._size:end] = type_codes
+        self._prices[self._size:end] = prices
+        self._cash[self._size:end] = cash
+        self._holdings[self._size:end] = holdings
+        if details is None:
+            self._details.extend([None] * count)
+        else:
+            self._details.extend((details, index) for index in details_indexes)
+        self._size = end
+
+    def get_details(self, index: int) -> dict:
+        """
+        :return: details of the transaction, or an empty dict if there are none
+        """
+        details = self._details[index]
+        if isinstance(details, tuple):
+            details_sequence, details_index = details
+            details = details_sequence[details_index]
+
+        return details if details else {}
+
+    def _ensure_capacity(self, capacity: int):
+        current_capacity = len(self._type_codes)
+        if capacity <= current_capacity:
+            return
+
+        new_capacity = max(capacity, current_capacity * 2)
+        for name in ["_timestamps", "_type_codes", "_prices", "_cash", "_holdings"]:
+            old_array = getattr(self, name)
+            new_array = np.empty(new_capacity, dtype=old_array.dtype)
+            new_array[:self._size] = old_array[:self._size]
+            setattr(self, name, new_array)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index: int) -> Transaction:
+        if index < 0:
+            index += self._size
+        if index < 0 or index >= self._size:
+            raise IndexError(f"Transaction index out of range: {index}")
+
+        statistics = {
+            statistics_fields.ACCOUNT_SUMMARY: {
+                statistics_fields.CASH: self._cash[index],
+                statistics_fields.HOLDINGS: self._holdings[index],
+            }
+        }
+
+        details = self.get_details(index)
+        if details:
+            statistics[statistics_fields.TRANSACTION_DETAILS] = details
+
+        return Transaction(TransactionType.from_signal(self._type_codes[index]), Timestamp(self._timestamps[index]), self._prices[index], statistics)
+
+    def __iter__(self):
+        for index in range(self._size):
+            yield self[index]
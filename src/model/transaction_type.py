@@ -5,3 +5,30 @@ class TransactionType(enum.Enum):
     BUY = "BUY"
     SELL = "SELL"
     HOLD = "HOLD"
+
+    def to_signal(self) -> int:
+        """
+        :return: numeric representation of the transaction type, as used in signal vectors
+        """
+        return _TRANSACTION_TYPE_TO_SIGNAL[self]
+
+    @staticmethod
+    def from_signal(signal: int) -> "TransactionType":
+        """
+        :param signal: numeric representation of a transaction type, as used in signal vectors
+        :return: the TransactionType represented by the signal
+        """
+        return _SIGNAL_TO_TRANSACTION_TYPE[int(signal)]
+
+
+SIGNAL_BUY = 1
+SIGNAL_SELL = -1
+SIGNAL_HOLD = 0
+
+_TRANSACTION_TYPE_TO_SIGNAL = {
+    TransactionType.BUY: SIGNAL_BUY,
+    TransactionType.SELL: SIGNAL_SELL,
+    TransactionType.HOLD: SIGNAL_HOLD
+}
+
+_SIGNAL_TO_TRANSACTION_TYPE = {signal: transaction_type for transaction_type, signal in _TRANSACTION_TYPE_TO_SIGNAL.items()}
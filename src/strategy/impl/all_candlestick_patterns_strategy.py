@@ -1,7 +1,12 @@
-from typing import Tuple
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Tuple, Optional
 
+import numpy as np
 import talib
+from numpy import ndarray
 from pandas import DataFrame, Series
+from talib import abstract
 
 from src.constants import ta_lib_candlestick_patterns
 from src.constants.mk_data_fields import MkDataFields
@@ -10,6 +15,13 @@ from src.strategy.strategy import IStrategy
 
 
 class AllCandleStickPatternsStrategy(IStrategy):
+    def __init__(self, subset_data_length: int = None):
+        """
+        :param subset_data_length: nr. of data points each advice is based on; required only for batch advices,
+                                   as patterns that need more data points than that are never found on a data subset
+        """
+        self.subset_data_length = subset_data_length
+
     def get_name(self) -> str:
         return f"AllCandleStickPatternsStrategy"
 
@@ -34,6 +46,46 @@ class AllCandleStickPatternsStrategy(IStrategy):
             else:
                 return TransactionType.HOLD, {"Reason": "Results are indecisive", "Results": found_patterns.to_dict()}
 
+    def get_transaction_advices(self, data: DataFrame) -> Optional[Tuple[ndarray, Sequence]]:
+        """
+        Same as get_transaction_advice applied on each subset of `subset_data_length` data points,
+        but recognizes the patterns only once, over the whole data set
+        Each pattern found on the last entry of a data subset depends only on the previous entries within the pattern's lookback,
+        so the results are the same as the ones found on each data subset
+        :param data: mkdata points for the whole simulated period
+        :return: signals and lazily computed details for each data point; None if subset_data_length has not been provided
+        """
+        if self.subset_data_length is None:
+            return None
+
+        patterns = self._get_patterns_matrix(data, self.subset_data_length)
+        bullish_ratings = np.where(patterns > 0, patterns, 0).sum(axis=1, dtype=np.int32)
+        bearish_ratings = -np.where(patterns < 0, patterns, 0).sum(axis=1, dtype=np.int32)
+        signals = np.sign(bullish_ratings - bearish_ratings).astype(np.int8)
+
+        return signals, _PatternsDetails(patterns, signals)
+
+    @staticmethod
+    def _get_patterns_matrix(data: DataFrame, subset_data_length: int) -> ndarray:
+        """
+        Recognizes all patterns over the whole data set
+        :param data: dataframe with MkDataFields as columns, and mk data entries as rows
+        :param subset_data_length: patterns with a lookback that doesn't fit into this nr. of data points are left unrecognized
+        :return: int16 matrix with a row per data entry, and a column per pattern (in the order of candlestick_patterns);
+                 values have the same meaning as in _apply_all_patterns
+        """
+        prices = [data[field].to_numpy(dtype=np.float64) for field in (MkDataFields.OPEN, MkDataFields.HIGH, MkDataFields.LOW, MkDataFields.CLOSE)]
+
+        result = np.zeros((len(data), len(ta_lib_candlestick_patterns.candlestick_patterns)), dtype=np.int16)
+        for column, function_name in enumerate(ta_lib_candlestick_patterns.candlestick_patterns):
+            if _get_lookback(function_name) >= subset_data_length:
+                continue
+
+            function = getattr(talib, function_name)
+            result[:, column] = function(*prices)
+
+        return result
+
     @staticmethod
     def _apply_all_patterns(data: DataFrame) -> DataFrame:
         """
@@ -67,3 +119,37 @@ class AllCandleStickPatternsStrategy(IStrategy):
         bearish = found_patterns[found_patterns < 0]
 
         return bullish, bearish
+
+
+@lru_cache(maxsize=None)
+def _get_lookback(function_name: str) -> int:
+    """
+    :return: nr. of data points preceding an entry that are required to recognize the pattern on it
+    """
+    return abstract.Function(function_name).lookback
+
+
+class _PatternsDetails(Sequence):
+    """
+    Details of the batch advices, computed only for the entries they are requested for
+    Each entry has the same details as the ones given by AllCandleStickPatternsStrategy.get_transaction_advice
+    """
+
+    def __init__(self, patterns: ndarray, signals: ndarray):
+        self.patterns = patterns
+        self.signals = signals
+        self.function_names = list(ta_lib_candlestick_patterns.candlestick_patterns)
+
+    def __len__(self):
+        return len(self.signals)
+
+    def __getitem__(self, index):
+        entry_patterns = self.patterns[index]
+        found_patterns = {self.function_names[column]: float(entry_patterns[column]) for column in np.flatnonzero(entry_patterns)}
+
+        if len(found_patterns) == 0:
+            return {"Reason": "No patterns found"}
+        elif self.signals[index] == TransactionType.HOLD.to_signal():
+            return {"Reason": "Results are indecisive", "Results": found_patterns}
+        else:
+            return found_patterns
@@ -1,9 +1,11 @@
-from typing import Tuple
+from typing import Tuple, Optional, Sequence
 
+import numpy as np
+from numpy import ndarray
 from pandas import DataFrame
 
 from src.constants.mk_data_fields import MkDataFields
-from src.helper import pandas_helper
+from src.helper import pandas_helper, rolling_mean_helper
 from src.model.transaction_type import TransactionType
 from src.strategy.strategy import IStrategy
 
@@ -27,7 +29,8 @@ class MeanSignalStrategy(IStrategy):
                              f" while only {len(data)} have been provided")
 
         data = pandas_helper.get_data_subset(data, index_start=len(data) - self.mean_period)
-        mean_price = data[MkDataFields.CLOSE].mean()
+        # the mean is computed in float64 for compact (float32) data too, as in get_transaction_advices, so both give the same advices
+        mean_price = data[MkDataFields.CLOSE].astype(np.float64, copy=False).mean()
         last_price = pandas_helper.get_last_value(data, MkDataFields.CLOSE)
         if last_price > mean_price:
             return TransactionType.BUY, {}
@@ -35,3 +38,31 @@ class MeanSignalStrategy(IStrategy):
             return TransactionType.SELL, {}
         else:
             return TransactionType.HOLD, {}
+
+    def get_transaction_advices(self, data: DataFrame) -> Optional[Tuple[ndarray, None]]:
+        """
+        Same as get_transaction_advice applied on each subset of `mean_period` data points,
+        but computes the mean prices of all subsets in a single pass
+        :param data: mkdata points for the whole simulated period
+        :return: signals for each data point, without details; None if close prices contain NaNs,
+                 as they are only skipped by the mean computed per subset
+        """
+        close_prices = data[MkDataFields.CLOSE].to_numpy(dtype=np.float64)
+        if np.isnan(close_prices).any():
+            return None
+
+        return rolling_mean_helper.get_mean_signals(close_prices, self.mean_period), None
+
+    @classmethod
+    def get_transaction_advices_by_subset_data_length(cls, data: DataFrame, subset_data_lengths: Sequence[int]) -> Optional[ndarray]:
+        """
+        Same as get_transaction_advices for each mean period, computed from the same prefix sums
+        :param data: mkdata points for the whole simulated period
+        :param subset_data_lengths: mean periods
+        :return: signals with a row per mean period, and a column per data point; None if close prices contain NaNs
+        """
+        close_prices = data[MkDataFields.CLOSE].to_numpy(dtype=np.float64)
+        if np.isnan(close_prices).any():
+            return None
+
+        return rolling_mean_helper.get_mean_signals_by_mean_period(close_prices, subset_data_lengths)
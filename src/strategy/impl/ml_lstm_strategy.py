@@ -1,30 +1,52 @@
-import collections
 import logging
-import os
-from os import path
-from typing import Tuple
+from typing import Tuple, Optional, Sequence, List
 
-import tensorflow as tf
+import numpy as np
+from numpy import ndarray
 from pandas import DataFrame, Timestamp
 
 from resources import config
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields
 from src.error.ml_setup_error import MlSetupError
-from src.helper import pandas_helper, ml_lstm_helper
-from src.helper.mk_data import av_crypto_helper
-from src.model.transaction_type import TransactionType
+from src.error.simulator_parameters_error import SimulatorParametersError
+from src.helper import pandas_helper, ml_lstm_helper, ml_lstm_model_registry
+from src.mk_data_provider import mk_data_provider_factory
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+from src.model.transaction_type import TransactionType, SIGNAL_BUY, SIGNAL_SELL, SIGNAL_HOLD
 from src.strategy.strategy import IStrategy
 
+# the models are trained on daily entries, so their advices are only valid on daily entries
+MODEL_DATA_INTERVAL = intervals.DAILY
+
 
 class MlLstmStrategy(IStrategy):
     log = logging.getLogger(__name__)
 
-    def __init__(self, ticker, data_set_length, epochs=10, hold_range=0.0):
-        self.models = collections.OrderedDict()
+    def __init__(self, ticker, data_set_length, epochs=10, hold_range=0.0, mk_data_provider: IMkDataProvider = None, incremental_training: bool = None,
+                 interval: str = MODEL_DATA_INTERVAL):
+        """
+        :param interval: interval of the market data the advices are given on; only MODEL_DATA_INTERVAL is supported
+        :param incremental_training: whether each yearly model is fine-tuned from the model of the previous year, on the data of the year
+                                     (plus ML_INCREMENTAL_TRAINING_REPLAY_ENTRIES older entries), instead of being trained from scratch on the whole history;
+                                     defaults to ML_INCREMENTAL_TRAINING_ENABLED
+        """
+        if interval != MODEL_DATA_INTERVAL:
+            raise SimulatorParametersError(f"MlLstmStrategy supports only {MODEL_DATA_INTERVAL} market data, since its models are trained on it, but got: {interval}")
+
         self.ticker = ticker
+        self.mk_data_provider = mk_data_provider or mk_data_provider_factory.get_concrete_mk_data_provider()
         self.data_set_length = data_set_length
         self.time_steps = data_set_length - 2
         self.epochs = epochs
         self.buy_threshold, self.sell_threshold = self._get_buy_sell_thresholds(hold_range)
+        self.incremental_training = config.ML_INCREMENTAL_TRAINING_ENABLED if incremental_training is None else incremental_training
+
+        # features of the data set the strategy has been prepared for (see prepare), shared by the advices of all its data subsets
+        self._prepared_data = None
+        self._prepared_timestamps = None
+        self._features = None
+        self._feature_values = None
 
     @staticmethod
     def _get_buy_sell_thresholds(hold_range):
@@ -36,11 +58,58 @@ class MlLstmStrategy(IStrategy):
     def get_name(self) -> str:
         return f"MlLstmStrategy(subset_data_length={self.data_set_length})"
 
+    def prepare(self, data: DataFrame):
+        """
+        Computes the features (percentage changes, clipped volume, and direction labels) of the whole data set once,
+        so the advice on each of its data subsets only takes a window of them, see get_transaction_advice;
+        and pre-trains all the models the advices on the data set need, if ML_PRETRAINING_ENABLED
+        Incrementally trained models are pre-trained one after another, since each of them starts from the model of the previous year
+        """
+        self._get_features(data)
+
+        if not config.ML_PRETRAINING_ENABLED or len(data) < self.data_set_length:
+            return
+
+        if self.incremental_training:
+            for model_timestamp in self._get_model_timestamps(data):
+                self._get_model_by_timestamp(model_timestamp)
+        else:
+            ml_lstm_model_registry.pretrain_models(self.ticker, self.time_steps, self.epochs, self._get_model_timestamps(data),
+                                                   lambda model_timestamp: self.mk_data_provider.get_historical_data(self.ticker, MODEL_DATA_INTERVAL, _from=None,
+                                                                                                                     to=Timestamp(model_timestamp)))
+
     def get_transaction_advice(self, data: DataFrame) -> Tuple[TransactionType, dict]:
         if len(data) < self.data_set_length:
             raise ValueError(f"{self.get_name()} strategy requires {self.data_set_length} data points to calculate mean price,"
                              f" while only {len(data)} have been provided")
 
+        prepared_sample = self._get_prepared_sample(data)
+        if prepared_sample is not None:
+            x_test, first_data_set_date = prepared_sample
+        else:
+            x_test, first_data_set_date = self._get_sample(data)
+
+        model = self._get_model(first_data_set_date)
+        # model = self._get_latest_available_model_before_date(first_data_set_date)
+
+        # feed data set into model to get prediction
+        y_predicted = model.predict(x_test)
+
+        # result is a value between 0 and 1, where closer to 0 is SELL, and closer to 1 is BUY
+        prediction = y_predicted[0][0]
+
+        # return transaction advice based on the prediction value range
+        if prediction < self.sell_threshold:
+            return TransactionType.SELL, {"prediction": prediction}
+        elif prediction > self.buy_threshold:
+            return TransactionType.BUY, {"prediction": prediction}
+        else:
+            return TransactionType.HOLD, {"prediction": prediction}
+
+    def _get_sample(self, data: DataFrame) -> Tuple[ndarray, Timestamp]:
+        """
+        :return: the sample the model should predict the advice on the last entry of the data from, and the date which chooses the model
+        """
         # strip only the data withing the length of the necessary data set
         data = pandas_helper.get_data_subset(data, index_start=len(data) - self.data_set_length)
 
@@ -58,55 +127,133 @@ class MlLstmStrategy(IStrategy):
         # create one single entry point based on the subset
         # steps should be the total number of entries minus 1 (removed nulls) minus 1 (the actual entry that will include the time steps)
         time_steps = self.data_set_length - 1 - 1
-        x_test, _ = ml_lstm_helper.create_dataset(data, data[ml_lstm_helper.TARGET_COLUMN], time_steps)
+        x_test, _ = ml_lstm_helper.create_dataset(data, data[ml_lstm_helper.TARGET_COLUMN], time_steps, as_view=True)
 
         # extract the latest model created based on the data set prior to the first date in the analyzed data
         first_data_set_date = data.index[0]
 
-        model = self._get_model(first_data_set_date)
-        # model = self._get_latest_available_model_before_date(first_data_set_date)
+        return x_test, first_data_set_date
 
-        # feed data set into model to get prediction
-        y_predicted = model.predict(x_test)
+    def _get_prepared_sample(self, data: DataFrame) -> Optional[Tuple[ndarray, Timestamp]]:
+        """
+        Same as _get_sample, but takes the sample as a window view of the features of the data set the strategy has been prepared for
+        :return: None if the data is not a subset of the prepared data set (i.e. it does not end with consecutive entries of it, sharing its values)
+        """
+        if self._feature_values is None:
+            return None
 
-        # result is a value between 0 and 1, where closer to 0 is SELL, and closer to 1 is BUY
-        prediction = y_predicted[0][0]
+        # position of the last entry of the data within the prepared data set, and of the first entry of the subset
+        end = int(np.searchsorted(self._prepared_timestamps, data.index[-1].to_datetime64()))
+        start = end - (self.data_set_length - 1)
+        if start < 0 or end >= len(self._prepared_timestamps) or self._prepared_timestamps[end] != data.index[-1].to_datetime64() \
+                or self._prepared_timestamps[start] != data.index[len(data) - self.data_set_length].to_datetime64() \
+                or not np.may_share_memory(data[MkDataFields.CLOSE].to_numpy(), self._prepared_data[MkDataFields.CLOSE].to_numpy()):
+            return None
 
-        # return transaction advice based on the prediction value range
-        if prediction < self.sell_threshold:
-            return TransactionType.SELL, {"prediction": prediction}
-        elif prediction > self.buy_threshold:
-            return TransactionType.BUY, {"prediction": prediction}
+        # features are shifted by one entry, as the first entry has no percentage change; the sample ends with the entry before the last one
+        x_test = self._feature_values[np.newaxis, start:start + self.time_steps]
+        return x_test, self._features.index[start]
+
+    def _get_features(self, data: DataFrame) -> Optional[DataFrame]:
+        """
+        :return: the features of each entry of the data, except the first one (which has no percentage change), computed once per data set;
+                 None if the data contains NaNs, which are dropped from each subset separately
+        """
+        if self._prepared_data is data:
+            return self._features
+
+        # the first row has no percentage change, and is dropped by the clean-up
+        features = data.pct_change()
+        if data.isna().to_numpy().any() or features.iloc[1:].isna().to_numpy().any():
+            features = None
         else:
-            return TransactionType.HOLD, {"prediction": prediction}
+            features = ml_lstm_helper.clean_up_data(features)
+            ml_lstm_helper.add_direction_column(features)
 
-    def _get_model(self, date: Timestamp):
+        self._prepared_data = data
+        self._prepared_timestamps = data.index.to_numpy(dtype="datetime64[ns]")
+        self._features = features
+        self._feature_values = features.to_numpy() if features is not None else None
+        return features
+
+    def get_transaction_advices(self, data: DataFrame) -> Optional[Tuple[ndarray, Sequence[dict]]]:
+        """
+        Same as get_transaction_advice applied on each subset of `data_set_length` data points, but builds the samples of all subsets at once,
+        and asks each model for the predictions of all the samples it's used for, in a single predict call
+        The percentage changes, the clipped volume and the direction label of an entry only depend on the entry and the next/previous one,
+        so they are computed once over the whole data set, with the same results as on each subset
+        :param data: mkdata points for the whole simulated period
+        :return: signals and details for each data point; None if the data contains NaNs, which are dropped from each subset separately
+        """
+        features = self._get_features(data)
+        if features is None:
+            return None
+
+        signals = np.full(len(data), SIGNAL_HOLD, dtype=np.int8)
+        details = [{} for _ in range(len(data))]
+        if len(data) < self.data_set_length:
+            return signals, details
+
+        # the sample of the subset ending with entry i + data_set_length - 1 is made of the features from i to i + time_steps - 1,
+        # and the model for it is chosen by the date of its first feature (same as data.index[0] of the subset, after dropping its first row)
+        x, _ = ml_lstm_helper.create_dataset(features, features[ml_lstm_helper.TARGET_COLUMN], self.time_steps, as_view=True)
+        first_feature_dates = features.index[:len(x)]
+        model_years = first_feature_dates.year.to_numpy()
+
+        # the dates are sorted, so the samples of each model are contiguous
+        _, year_starts = np.unique(model_years, return_index=True)
+        year_ends = np.append(year_starts[1:], len(x))
+        predictions = np.concatenate([self._get_model(first_feature_dates[start]).predict(x[start:end])[:, 0] for start, end in zip(year_starts, year_ends)])
+
+        first_advice_index = self.data_set_length - 1
+        signals[first_advice_index:] = np.where(predictions < self.sell_threshold, SIGNAL_SELL, np.where(predictions > self.buy_threshold, SIGNAL_BUY, SIGNAL_HOLD))
+        for index, prediction in enumerate(predictions, start=first_advice_index):
+            details[index] = {"prediction": prediction}
+
+        return signals, details
+
+    def _get_model_timestamps(self, data: DataFrame) -> List[str]:
+        """
+        :return: the dates of the models needed for the advices on all the data subsets of the data set
+        """
+        # the model of each subset is chosen by its second entry (the first one after dropping the entry without percentage change)
+        first_data_set_dates = data.index[1:len(data) - self.data_set_length + 2]
+        return [self._get_model_timestamp(year) for year in first_data_set_dates.year.unique()]
+
+    @staticmethod
+    def _get_model_timestamp(year: int) -> str:
         # model date should be Dec 31 of the previous year
-        model_year = int(date.year) - 1
-        model_timestamp = f"{model_year}-12-31"
-
-        # check if model is already in the dict
-        if model_timestamp in self.models:
-            return self.models[model_timestamp]
-
-        # check if model is already computed, and load it if so
-        model_dir_name = f"model_{self.ticker}_{self.time_steps}-steps_{self.epochs}-epochs_until-{model_timestamp}"
-        model_path = os.path.join(config.LSTM_MODELS_PATH, model_dir_name)
-        if path.exists(model_path):
-            self.log.info(f"Saved model found, load Model by path: {model_path}")
-            model = tf.keras.models.load_model(model_path)
-            self.models[model_timestamp] = model
-            self.log.info(f"Model loaded")
-            return model
-
-        # compute, and save new model
-        self.log.info(f"New model required, train and save model by path: {model_path}")
-        raw_model_data = av_crypto_helper.download_daily_historical_data(ticker=self.ticker, _from=None, to=Timestamp(model_timestamp))
-        model = ml_lstm_helper.compute_model(raw_data=raw_model_data, time_steps=self.time_steps, test_data_split_pct=0, epochs=self.epochs)
-        model.save(model_path)
-        self.models[model_timestamp] = model
-        self.log.info(f"Model created")
-        return model
+        model_year = int(year) - 1
+        return f"{model_year}-12-31"
+
+    def _get_model(self, date: Timestamp):
+        return self._get_model_by_timestamp(self._get_model_timestamp(date.year))
+
+    def _get_model_by_timestamp(self, model_timestamp: str):
+        # the model is shared by all the strategies of the process, and loaded or computed only if it's not in memory yet
+        return ml_lstm_model_registry.get_model(self.ticker, self.time_steps, self.epochs, model_timestamp, lambda: self._compute_model(model_timestamp),
+                                                self._get_model_suffix())
+
+    def _get_model_suffix(self) -> str:
+        # incrementally trained models are saved apart from the ones trained from scratch, and depend on the replayed entries too
+        return f"_incremental-{config.ML_INCREMENTAL_TRAINING_REPLAY_ENTRIES}-replay" if self.incremental_training else ""
+
+    def _compute_model(self, model_timestamp: str):
+        raw_model_data = self.mk_data_provider.get_historical_data(self.ticker, MODEL_DATA_INTERVAL, _from=None, to=Timestamp(model_timestamp))
+        if not self.incremental_training:
+            return ml_lstm_helper.compute_model(raw_data=raw_model_data, time_steps=self.time_steps, test_data_split_pct=0, epochs=self.epochs)
+
+        # the first model (whose previous year has not enough data for a single sample) is trained from scratch
+        previous_model_timestamp = self._get_model_timestamp(Timestamp(model_timestamp).year)
+        if raw_model_data.index.searchsorted(Timestamp(previous_model_timestamp), side="right") <= self.time_steps + 1:
+            return ml_lstm_helper.compute_model(raw_data=raw_model_data, time_steps=self.time_steps, test_data_split_pct=0, epochs=self.epochs)
+
+        previous_model = self._get_model_by_timestamp(previous_model_timestamp)
+        raw_training_data = ml_lstm_helper.get_incremental_training_data(raw_model_data, Timestamp(previous_model_timestamp), self.time_steps,
+                                                                         config.ML_INCREMENTAL_TRAINING_REPLAY_ENTRIES)
+        self.log.info(f"Fine-tune the model until {previous_model_timestamp} on {len(raw_training_data)} entries, up to {model_timestamp}")
+        return ml_lstm_helper.compute_model(raw_data=raw_training_data, time_steps=self.time_steps, test_data_split_pct=0, epochs=self.epochs,
+                                            initial_model=previous_model)
 
     def _get_latest_available_model_before_date(self, date):
         """
@@ -115,7 +262,7 @@ class MlLstmStrategy(IStrategy):
         :return: the newest model
         """
         latest_model = None
-        for model_date, model in self.models.items():
+        for model_date, model in ml_lstm_model_registry.get_models(self.ticker, self.time_steps, self.epochs, self._get_model_suffix()).items():
             model_date = Timestamp(model_date)
             if model_date < date:
                 latest_model = model
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Union, Optional, Tuple, Sequence
 
+from numpy import ndarray
 from pandas import DataFrame
 
 from src.model.transaction_type import TransactionType
@@ -30,3 +31,39 @@ class IStrategy(ABC):
         :return: a TransactionType which represents the advised action, and the details of the decision, if any
         """
         pass
+
+    def prepare(self, data: DataFrame):
+        """
+        Optional hook, called by the simulator with the whole data set before asking for any advice on it,
+        so strategies can compute once what is shared by the advices on all its data subsets (which are views of the data set)
+        :param data: timestamp/open/close/low/high/volume data for the whole simulated period
+        """
+        pass
+
+    def get_transaction_advices(self, data: DataFrame) -> Optional[Tuple[ndarray, Optional[Sequence[dict]]]]:
+        """
+        Optional batch counterpart of get_transaction_advice, which generates the advices for all entries of the data set in one call
+        The advice for each entry must be the same as the one get_transaction_advice would give on the data subset ending with that entry;
+        entries that don't have enough previous data points to make a decision are skipped by the simulator, so their value is irrelevant
+
+        Strategies that are not able to do that should not override this method, and will be simulated entry by entry
+        :param data: timestamp/open/close/low/high/volume data for the whole simulated period
+        :return: a tuple with an array of signals (see TransactionType.to_signal), one per data entry,
+                 and a sequence with the details of each decision (None if there are no details);
+                 or None if the strategy does not support batch advices
+        """
+        return None
+
+    @classmethod
+    def get_transaction_advices_by_subset_data_length(cls, data: DataFrame, subset_data_lengths: Sequence[int]) -> Optional[ndarray]:
+        """
+        Optional counterpart of get_transaction_advices for sweeps over the subset data length, which generates at once the signals
+        of all strategies built for each of the provided subset data lengths (see strategy_factory.get_concrete_strategy)
+
+        Strategies that are not able to do that should not override this method, and will be simulated separately for each length
+        :param data: timestamp/open/close/low/high/volume data for the whole simulated period
+        :param subset_data_lengths: nr. of data points each strategy should use to make a decision
+        :return: 2D array of signals (see TransactionType.to_signal) with a row per subset data length, and a column per data entry;
+                 or None if the strategy does not support it
+        """
+        return None
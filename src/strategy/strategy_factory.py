@@ -1,15 +1,20 @@
+from src.constants import intervals
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
 from src.strategy.impl.all_candlestick_patterns_strategy import AllCandleStickPatternsStrategy
 from src.strategy.impl.mean_signal_strategy import MeanSignalStrategy
 from src.strategy.impl.ml_lstm_strategy import MlLstmStrategy
 from src.strategy.strategy import IStrategy
 
 
-def get_concrete_strategy(strategy_type, ticker, subset_data_length) -> IStrategy:
+def get_concrete_strategy(strategy_type, ticker, subset_data_length, mk_data_provider: IMkDataProvider = None, interval: str = intervals.DAILY) -> IStrategy:
+    """
+    :param interval: interval of the market data the strategy is simulated on
+    """
     if strategy_type == MeanSignalStrategy:
         return MeanSignalStrategy(subset_data_length)
     elif strategy_type == MlLstmStrategy:
-        return MlLstmStrategy(ticker, subset_data_length)
+        return MlLstmStrategy(ticker, subset_data_length, mk_data_provider=mk_data_provider, interval=interval)
     elif strategy_type == AllCandleStickPatternsStrategy:
-        return AllCandleStickPatternsStrategy()
+        return AllCandleStickPatternsStrategy(subset_data_length)
     else:
         raise NotImplementedError(f"No such strategy: {strategy_type}")
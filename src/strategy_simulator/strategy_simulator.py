@@ -1,4 +1,8 @@
 import logging
+from typing import Tuple, Optional, Sequence
+
+from numpy import ndarray
+from pandas import DataFrame
 
 from resources import config
 
@@ -29,6 +33,35 @@ class StrategySimulator:
 
         portfolio = SingleTickerPortfolio(mk_data.ticker, config.SIMULATOR_INITIAL_CASH, config.SIMULATOR_TRANSACTIONS_FEE, config.SIMULATOR_LOG_TRANSACTIONS)
 
+        strategy.prepare(data)
+        batch_advices = strategy.get_transaction_advices(data) if config.SIMULATOR_BATCH_ADVICES else None
+        if batch_advices is not None:
+            StrategySimulator._register_batch_advices(portfolio, data, subset_data_length, batch_advices)
+        else:
+            StrategySimulator._register_advices_by_data_subset(portfolio, data, subset_data_length, strategy)
+
+        return portfolio
+
+    @staticmethod
+    def simulate_signals(ticker: str, data: DataFrame, signals: ndarray, first_index: int) -> SingleTickerPortfolio:
+        """
+        Simulates trading on historical data based on already computed signals
+        :param ticker: ticker the data belongs to
+        :param data: historical data to use
+        :param signals: a signal (see TransactionType.to_signal) for each data entry
+        :param first_index: index of the first entry to act on
+        :return: a simulated portfolio, with remaining cash, holdings, and all buy/sell transactions
+        """
+        portfolio = SingleTickerPortfolio(ticker, config.SIMULATOR_INITIAL_CASH, config.SIMULATOR_TRANSACTIONS_FEE, config.SIMULATOR_LOG_TRANSACTIONS)
+        portfolio.register_signals(data.index, data[MkDataFields.CLOSE].to_numpy(), signals, first_index=first_index)
+        return portfolio
+
+    @staticmethod
+    def _register_advices_by_data_subset(portfolio: SingleTickerPortfolio, data: DataFrame, subset_data_length: int, strategy: IStrategy):
+        """
+        Asks the strategy for an advice on each separate data subset, and registers it to the portfolio
+        """
+        data_length = len(data.index)
         for start_index in range(0, data_length):
             if start_index > data_length - subset_data_length:
                 break
@@ -42,4 +75,14 @@ class StrategySimulator:
 
             portfolio.register_transaction(reference_timestamp, reference_price, transaction_advice, details)
 
-        return portfolio
+    @staticmethod
+    def _register_batch_advices(portfolio: SingleTickerPortfolio, data: DataFrame, subset_data_length: int, batch_advices: Tuple[ndarray, Optional[Sequence[dict]]]):
+        """
+        Registers to the portfolio the advices generated by the strategy for the whole data set at once;
+        the first (subset_data_length - 1) entries are skipped, same as when the advices are requested per data subset
+        """
+        signals, details = batch_advices
+        if len(signals) != len(data.index):
+            raise ValueError(f"Expected {len(data.index)} transaction advices (one per data entry), but got {len(signals)}")
+
+        portfolio.register_signals(data.index, data[MkDataFields.CLOSE].to_numpy(), signals, details, first_index=subset_data_length - 1)
@@ -1,18 +1,23 @@
 import logging
 from collections import OrderedDict
-from datetime import timedelta
+from concurrent.futures import as_completed
 
 import matplotlib.pyplot as plt
-from pandas import Timestamp, DataFrame
+import numpy as np
+from pandas import DataFrame, Series
 
 from resources import config
 from src.constants import statistics_fields
 from src.constants.mk_data_fields import MkDataFields
-from src.helper import formatter
-from src.helper.mk_data import av_crypto_helper
+from src.error.mk_data_request_error import MkDataRequestError
+from src.error.simulator_parameters_error import SimulatorParametersError
+from src.helper import formatter, process_pool_helper
+from src.mk_data_provider import mk_data_provider_factory
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
 from src.model.mk_data import MkData
 from src.model.performance_statistics import PerformanceStatistics
 from src.model.single_ticker_portfolio import SingleTickerPortfolio
+from src.model.transaction_log import TransactionLog
 from src.model.transaction_type import TransactionType
 from src.strategy import strategy_factory
 from src.strategy.strategy import IStrategy
@@ -21,30 +26,161 @@ from src.strategy_simulator.strategy_simulator import StrategySimulator
 log = logging.getLogger(__name__)
 
 
-# [IMPROVEMENT] make offset possible for other intervals than 1d
-def prepare_simulation_mk_data(ticker, subset_data_length, start_date, end_date, interval):
-    left_offset = formatter.get_timedelta(subset_data_length - 1, interval)  # get extra data for making decision for the first entry
-    start_date_with_offset = start_date - left_offset
+def prepare_simulation_mk_data(ticker, subset_data_length, start_date, end_date, interval, mk_data_provider: IMkDataProvider = None, compact: bool = None):
+    """
+    Gets the market data of the period, plus the (subset_data_length - 1) entries before start_date, as extra data for making decision for the first entry
+    The offset is counted in entries, not in calendar time, so it's right for markets that are not always open (nights, weekends, holidays):
+    the data is requested with the lookback of a market without gaps first, and with longer lookbacks if there are not enough entries before start_date;
+    if any lookback goes past the first available data (e.g. before the first month of intraday data that can be requested),
+    all the data available before start_date is requested instead
+    :param compact: whether to keep the market data with compact dtypes, see MkData; defaults to MK_DATA_COMPACT_DTYPES
+    :return: market data, starting exactly (subset_data_length - 1) entries before start_date
+    """
+    mk_data_provider = mk_data_provider or mk_data_provider_factory.get_concrete_mk_data_provider()
+    offset = subset_data_length - 1
+    lookback = formatter.get_timedelta(offset, interval)
+
+    for _try in range(config.SIMULATOR_MK_DATA_LOOKBACK_MAX_TRIES):
+        try:
+            mk_data = _get_mk_data(mk_data_provider, ticker, start_date, end_date, interval, start_date - lookback, compact)
+        except MkDataRequestError:
+            log.info(f"Could not get market data with a lookback of {lookback}, retry with all the data available before {start_date}")
+            mk_data = _get_mk_data(mk_data_provider, ticker, start_date, end_date, interval, None, compact)
+            lookback = None
+
+        start_index = mk_data.get_start_position()
+        if start_index >= offset:
+            return mk_data.slice(start_index - offset)
+        if lookback is None:
+            raise SimulatorParametersError(f"There are only {start_index} market data entries available before {start_date}, while {offset} are needed")
+
+        # extend the lookback based on the density of the entries before start_date, with some margin
+        log.info(f"Got {start_index} entries out of {offset} needed before {start_date} with a lookback of {lookback}, retry with a longer lookback")
+        lookback = lookback * max(1.5, 1.25 * offset / max(start_index, 1))
+
+    raise SimulatorParametersError(f"Could not get {offset} market data entries before {start_date} "
+                                   f"in {config.SIMULATOR_MK_DATA_LOOKBACK_MAX_TRIES} tries, with a lookback up to {lookback}")
+
+
+def _get_mk_data(mk_data_provider: IMkDataProvider, ticker, start_date, end_date, interval, start_date_with_offset, compact: bool = None) -> MkData:
+    columnar_data = mk_data_provider.get_columnar_data(ticker, interval, start_date_with_offset, end_date)
+    if columnar_data is not None:
+        return MkData(ticker, start_date, end_date, interval, columnar_data=columnar_data, compact=compact)
+
+    data = mk_data_provider.get_historical_data(ticker, interval, start_date_with_offset, end_date)
+    return MkData(ticker, start_date, end_date, interval, data, compact=compact)
+
+
+def get_strategy_performances_by_subset_data_length(min_subset_data_length, max_subset_data_length, mk_data: MkData, strategy_type, workers=None,
+                                                    mk_data_provider: IMkDataProvider = None):
+    """
+    Simulates the strategy built for each subset data length between min and max (inclusive)
+    :param min_subset_data_length: the smallest subset data length to simulate
+    :param max_subset_data_length: the biggest subset data length to simulate
+    :param mk_data: market data to use for simulations, including the offset required by max_subset_data_length
+    :param strategy_type: type of the strategy to simulate
+    :param workers: nr. of processes the simulations are spread across; defaults to process_pool_helper.get_default_workers()
+    :param mk_data_provider: provider of any additional market data the strategies need, defaults to AlphaVantageMkDataProvider
+    :return: OrderedDict with key: subset data length -> value: strategy performance, sorted by subset data length
+    """
+    subset_data_lengths = list(range(min_subset_data_length, max_subset_data_length + 1))
+
+    signals_by_subset_data_length = None
+    if config.SIMULATOR_BATCH_ADVICES:
+        signals_by_subset_data_length = strategy_type.get_transaction_advices_by_subset_data_length(mk_data.data, subset_data_lengths)
+
+    if signals_by_subset_data_length is not None:
+        return _get_strategy_performances_from_signals(subset_data_lengths, signals_by_subset_data_length, mk_data)
+
+    workers = workers or process_pool_helper.get_default_workers()
+    if workers > 1 and len(subset_data_lengths) > 1:
+        return _get_strategy_performances_in_parallel(subset_data_lengths, mk_data, strategy_type, workers, mk_data_provider)
+
+    result = OrderedDict()
+    for subset_data_length in subset_data_lengths:
+        result[subset_data_length] = _get_strategy_performance_on_truncated_data(mk_data, subset_data_length, strategy_type, mk_data_provider)
+
+        if len(result) % 10 == 0:
+            log.info(f"Processed strategy simulations: {len(result)}")
+
+    log.info(f"Processed all strategy simulations: {len(result)}")
+    return result
+
+
+def _get_strategy_performances_in_parallel(subset_data_lengths, mk_data: MkData, strategy_type, workers, mk_data_provider: IMkDataProvider = None):
+    """
+    Same as the sequential simulation of each subset data length, but spread across a pool of processes
+    Market data (and its provider) is sent to each process only once, when the process starts, and each task receives just the subset data length;
+    market data mapped to a columnar store is sent as a reference to the store, which each process maps again, and builds a DataFrame from only once,
+    so the tasks slice views of it by position
+    The processes are started from scratch, with a limited nr. of threads each, see process_pool_helper.get_process_pool
+    :return: OrderedDict with key: subset data length -> value: strategy performance, in the same order as subset_data_lengths
+    """
+    log.info(f"Run {len(subset_data_lengths)} strategy simulations across {workers} processes")
+
+    performances = {}
+    with process_pool_helper.get_process_pool(workers, _init_simulation_worker, (mk_data, mk_data_provider)) as executor:
+        futures = [executor.submit(_run_simulation_worker_task, subset_data_length, strategy_type) for subset_data_length in subset_data_lengths]
+        for future in as_completed(futures):
+            subset_data_length, strategy_performance = future.result()
+            performances[subset_data_length] = strategy_performance
 
-    data = av_crypto_helper.download_daily_historical_data(ticker=ticker, _from=start_date_with_offset, to=end_date)
-    return MkData(ticker, start_date, end_date, interval, data)
+            if len(performances) % 10 == 0:
+                log.info(f"Processed strategy simulations: {len(performances)}")
 
+    log.info(f"Processed all strategy simulations: {len(performances)}")
+    return OrderedDict((subset_data_length, performances[subset_data_length]) for subset_data_length in subset_data_lengths)
 
-def get_strategy_performances_by_subset_data_length(min_subset_data_length, max_subset_data_length, mk_data: MkData, strategy_type):
-    orig_data = mk_data.data
+
+# market data, and its provider, shared by all tasks of a simulation worker process
+_worker_mk_data: MkData = None
+_worker_mk_data_provider: IMkDataProvider = None
+
+
+def _init_simulation_worker(mk_data: MkData, mk_data_provider: IMkDataProvider):
+    global _worker_mk_data, _worker_mk_data_provider
+    _worker_mk_data = mk_data
+    _worker_mk_data_provider = mk_data_provider
+
+    # the DataFrame is built only once per process (from the memory-mapped store, for columnar data), and each task simulates a positional view of it
+    _worker_mk_data.data
+
+
+def _run_simulation_worker_task(subset_data_length, strategy_type):
+    return subset_data_length, _get_strategy_performance_on_truncated_data(_worker_mk_data, subset_data_length, strategy_type, _worker_mk_data_provider)
+
+
+def _get_strategy_performance_on_truncated_data(mk_data: MkData, subset_data_length, strategy_type, mk_data_provider: IMkDataProvider = None):
+    """
+    Truncates market data up to the offset required by subset_data_length, and simulates the strategy built for this length on it
+    :return: performance of the strategy
+    """
+    start_index_with_offset = _get_start_index_with_offset(mk_data, subset_data_length)
+    truncated_mk_data = mk_data.slice(start_index_with_offset)
+
+    strategy = strategy_factory.get_concrete_strategy(strategy_type, mk_data.ticker, subset_data_length, mk_data_provider, mk_data.interval)
+    strategy_portfolio = simulate(truncated_mk_data, strategy, subset_data_length)
+    return _get_strategy_performance(truncated_mk_data, strategy_portfolio)
+
+
+def _get_strategy_performances_from_signals(subset_data_lengths, signals_by_subset_data_length, mk_data: MkData):
+    """
+    Same as get_strategy_performances_by_subset_data_length, but simulates signals that have already been computed
+    for each subset data length over the whole market data, instead of running the strategy on each truncated data
+    :param subset_data_lengths: subset data lengths to simulate
+    :param signals_by_subset_data_length: 2D array of signals, with a row for each of the subset data lengths
+    :param mk_data: market data the signals have been computed on
+    :return: OrderedDict with key: subset data length -> value: strategy performance
+    """
+    data = mk_data.data
 
     result = OrderedDict()
-    for subset_data_length in range(min_subset_data_length, max_subset_data_length + 1):
-        # truncate mk_data up to subset_data_length
-        left_offset = timedelta(days=subset_data_length - 1)
-        start_date_with_offset = formatter.extract_time_and_convert_to_string(mk_data.start_date, config.GENERAL_DATE_FORMAT, left_offset)
-        mk_data.data = orig_data.truncate(before=Timestamp(start_date_with_offset))
-
-        # get performance for this data length
-        strategy = strategy_factory.get_concrete_strategy(strategy_type, mk_data.ticker, subset_data_length)
-        strategy_portfolio = simulate(mk_data, strategy, subset_data_length)
-        strategy_performance = _get_strategy_performance(mk_data, strategy_portfolio)
-        result[subset_data_length] = strategy_performance
+    for subset_data_length, signals in zip(subset_data_lengths, signals_by_subset_data_length):
+        # the simulation on truncated data would start acting on the entry with subset_data_length - 1 entries before it
+        start_index = _get_start_index_with_offset(mk_data, subset_data_length)
+
+        strategy_portfolio = StrategySimulator.simulate_signals(mk_data.ticker, data, signals, start_index + subset_data_length - 1)
+        result[subset_data_length] = _get_strategy_performance(mk_data, strategy_portfolio)
 
         if len(result) % 10 == 0:
             log.info(f"Processed strategy simulations: {len(result)}")
@@ -53,6 +189,18 @@ def get_strategy_performances_by_subset_data_length(min_subset_data_length, max_
     return result
 
 
+def _get_start_index_with_offset(mk_data: MkData, subset_data_length) -> int:
+    """
+    :return: index of the entry which is (subset_data_length - 1) entries before the start date of the market data
+    :raises SimulatorParametersError: if there are not enough entries before the start date
+    """
+    start_index = mk_data.get_start_position()
+    start_index_with_offset = start_index - (subset_data_length - 1)
+    if start_index_with_offset < 0:
+        raise SimulatorParametersError(f"Mk data has {start_index} entries before the start date, while subset data length[{subset_data_length}] requires {subset_data_length - 1}!")
+    return start_index_with_offset
+
+
 def get_strategy_over_market_performances(strategy_performances_by_subset_data_length: dict, mk_data: MkData, initial_cash):
     market_performance = _get_market_performance_from_data(mk_data, initial_cash)
 
@@ -106,15 +254,15 @@ def _get_market_performance_from_data(mk_data: MkData, initial_cash):
 
 
 def _get_buy_and_hold_value(mk_data: MkData, initial_cash):
-    buy_at = mk_data.data.loc[Timestamp(mk_data.start_date)][MkDataFields.CLOSE]
-    sell_at = mk_data.data.loc[Timestamp(mk_data.end_date)][MkDataFields.CLOSE]
+    buy_at = mk_data.get_start_close_price()
+    sell_at = mk_data.get_end_close_price()
     return (initial_cash / buy_at) * sell_at
 
 
 def _get_strategy_performance(mk_data: MkData, portfolio):
     strategy_end_value = portfolio.cash
     if portfolio.holdings > 0:
-        sell_at = mk_data.data.loc[Timestamp(mk_data.end_date)][MkDataFields.CLOSE]
+        sell_at = mk_data.get_end_close_price()
         strategy_end_value += (portfolio.holdings * sell_at)
 
     return (strategy_end_value - portfolio.initial_cash) * 100 / portfolio.initial_cash
@@ -149,7 +297,7 @@ def plot_strategy_performance(mk_data: MkData, strategy_portfolio: SingleTickerP
     """
 
     # make sure there is no offset data
-    data = mk_data.data.truncate(before=Timestamp(mk_data.start_date), after=Timestamp(mk_data.end_date))
+    data = mk_data.truncate(before=mk_data.start_date, after=mk_data.end_date).data
 
     portfolio_value_over_time = _get_portfolio_value_over_time(data, strategy_portfolio)
 
@@ -158,18 +306,18 @@ def plot_strategy_performance(mk_data: MkData, strategy_portfolio: SingleTickerP
     sell_data_points = _get_data_points_by_transaction_type(strategy_portfolio.transactions, portfolio_value_over_time, TransactionType.SELL)
 
     # plot strategy portfolio data
-    plt.plot(portfolio_value_over_time.keys(), portfolio_value_over_time.values(), color='skyblue', label=config.STRATEGY_SIMULATION_STRATEGY_PORTFOLIO_LABEL)
+    plt.plot(portfolio_value_over_time.index, portfolio_value_over_time.to_numpy(), color='skyblue', label=config.STRATEGY_SIMULATION_STRATEGY_PORTFOLIO_LABEL)
 
     if mark_buy_sell:
-        plt.plot(buy_data_points.keys(), buy_data_points.values(), marker=".", color='green', linestyle='None', markersize=config.STRATEGY_SIMULATION_MARKER_SIZE,
+        plt.plot(buy_data_points.index, buy_data_points.to_numpy(), marker=".", color='green', linestyle='None', markersize=config.STRATEGY_SIMULATION_MARKER_SIZE,
                  label=config.STRATEGY_SIMULATION_BUY_MARK_LABEL)
-        plt.plot(sell_data_points.keys(), sell_data_points.values(), marker=".", color='red', linestyle='None', markersize=config.STRATEGY_SIMULATION_MARKER_SIZE,
+        plt.plot(sell_data_points.index, sell_data_points.to_numpy(), marker=".", color='red', linestyle='None', markersize=config.STRATEGY_SIMULATION_MARKER_SIZE,
                  label=config.STRATEGY_SIMULATION_SELL_MARK_LABEL)
 
     if plot_market_performance:
         # calculate and add buy&hold data to plot
         buy_and_hold_value_over_time = _get_buy_and_hold_value_over_time(data, strategy_portfolio.initial_cash)
-        plt.plot(buy_and_hold_value_over_time.keys(), buy_and_hold_value_over_time.values(), label=config.STRATEGY_SIMULATION_BUY_AND_HOLD_PORTFOLIO_LABEL)
+        plt.plot(buy_and_hold_value_over_time.index, buy_and_hold_value_over_time.to_numpy(), label=config.STRATEGY_SIMULATION_BUY_AND_HOLD_PORTFOLIO_LABEL)
 
     # plot explanations
     plt.xlabel(config.STRATEGY_SIMULATION_X_LABEL)
@@ -180,60 +328,38 @@ def plot_strategy_performance(mk_data: MkData, strategy_portfolio: SingleTickerP
     plt.show()
 
 
-def _get_portfolio_value_over_time(data: DataFrame, strategy_portfolio: SingleTickerPortfolio) -> OrderedDict:
-    # get a map of key: Timestamp / value: Transaction
-    timestamp_to_transaction_dict = {transaction.timestamp: transaction for transaction in strategy_portfolio.transactions}
-
-    first_entry_processed = False
-    last_registered_transaction = None
-    result = OrderedDict()
-    for timestamp, row in data.iterrows():
-        if timestamp in timestamp_to_transaction_dict:
-            # calculate value based on the cash, and holdings found in the transaction's account summary
-            transaction = timestamp_to_transaction_dict[timestamp]
-            account_summary = transaction.statistics[statistics_fields.ACCOUNT_SUMMARY]
-            portfolio_value = _get_portfolio_value_from_account_summary(account_summary, row[MkDataFields.CLOSE])
-            last_registered_transaction = transaction
-        else:
-            if first_entry_processed:
-                if not last_registered_transaction:
-                    # if no transactions have been found yet, there is still only initial cash in portfolio
-                    portfolio_value = next(reversed(result.values()))
-                else:
-                    # find out the holdings of the portfolio from the latest transaction and calculate value based on current price
-                    account_summary = last_registered_transaction.statistics[statistics_fields.ACCOUNT_SUMMARY]
-                    portfolio_value = _get_portfolio_value_from_account_summary(account_summary, row[MkDataFields.CLOSE])
-            else:
-                # if first entry has not been processed yet, the portfolio value is initial cash
-                portfolio_value = strategy_portfolio.initial_cash
-                first_entry_processed = True
-
-        result[timestamp] = portfolio_value
-
-    return result
-
+def _get_portfolio_value_over_time(data: DataFrame, strategy_portfolio: SingleTickerPortfolio) -> Series:
+    """
+    :param data: market data the value should be computed for
+    :param strategy_portfolio: portfolio with the registered transactions
+    :return: value of the portfolio for each timestamp of the data, based on the cash and holdings after the latest transaction until then
+    """
+    transactions = strategy_portfolio.transactions
+    prices = data[MkDataFields.CLOSE].to_numpy()
+    if len(transactions) == 0:
+        return Series(float(strategy_portfolio.initial_cash), index=data.index)
 
-def _get_portfolio_value_from_account_summary(account_summary, price):
-    cash = account_summary[statistics_fields.CASH]
-    holdings = account_summary[statistics_fields.HOLDINGS]
-    holdings_value = holdings * price
-    return cash + holdings_value
+    # index of the latest transaction registered up to (and including) each timestamp, -1 if there is none yet
+    latest_transaction_indexes = np.searchsorted(transactions.timestamps, data.index.to_numpy(dtype="datetime64[ns]"), side="right") - 1
+    has_transactions = latest_transaction_indexes >= 0
+    latest_transaction_indexes = np.maximum(latest_transaction_indexes, 0)
 
+    # until the first transaction, there is only initial cash in portfolio
+    cash = np.where(has_transactions, transactions.cash[latest_transaction_indexes], strategy_portfolio.initial_cash)
+    holdings = np.where(has_transactions, transactions.holdings[latest_transaction_indexes], 0)
 
-def _get_buy_and_hold_value_over_time(data: DataFrame, initial_cash: float) -> OrderedDict:
-    holdings = initial_cash / data.iloc[0][MkDataFields.CLOSE]
+    return Series(cash + holdings * prices, index=data.index)
 
-    result = OrderedDict()
-    for timestamp, row in data.iterrows():
-        portfolio_value = holdings * row[MkDataFields.CLOSE]
-        result[timestamp] = portfolio_value
 
-    return result
+def _get_buy_and_hold_value_over_time(data: DataFrame, initial_cash: float) -> Series:
+    prices = data[MkDataFields.CLOSE]
+    holdings = initial_cash / prices.iloc[0]
+    return holdings * prices
 
 
-def _get_data_points_by_transaction_type(transactions, portfolio_value_over_time, transaction_type):
-    transactions_timestamps = [transaction.timestamp for transaction in transactions if transaction.action_type is transaction_type]
-    return {timestamp: portfolio_value_over_time[timestamp] for timestamp in transactions_timestamps}
+def _get_data_points_by_transaction_type(transactions: TransactionLog, portfolio_value_over_time: Series, transaction_type) -> Series:
+    transactions_timestamps = transactions.timestamps[transactions.type_codes == transaction_type.to_signal()]
+    return portfolio_value_over_time.loc[transactions_timestamps]
 
 
 def _get_performance_summary(self, strategy, performance_statistics):
@@ -0,0 +1,160 @@
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from pandas import Timestamp, Timedelta, date_range
+
+from resources import config
+from src.constants import intervals
+from src.error.mk_data_bulk_request_error import MkDataBulkRequestError
+from src.error.mk_data_request_error import MkDataRequestError
+from src.helper.mk_data import av_crypto_helper, mk_data_cache
+
+MAX_CONNECTIONS = 3
+FAILING_TICKER = "FAIL"
+RESPONSE_DELAY_SECONDS = 0.1
+
+
+class StubAvServer:
+    """
+    Local HTTP server answering AV daily requests with CSV data, and with an error status for FAILING_TICKER;
+    it records the requests, the connections they have been sent over, and the max nr. of requests it has handled concurrently
+    """
+
+    def __init__(self):
+        self.requested_tickers = []
+        self.client_ports = set()
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keeps the connections open, so the client can reuse them
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                ticker = parse_qs(urlparse(self.path).query)["symbol"][0]
+                server.on_request_start(ticker, self.client_address[1])
+                try:
+                    time.sleep(RESPONSE_DELAY_SECONDS)
+                    status, body = (500, b"") if ticker == FAILING_TICKER else (200, get_av_csv(ticker).encode())
+                finally:
+                    server.on_request_end()
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/x-download")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._http_server.server_address[1]}/query"
+
+    def on_request_start(self, ticker: str, client_port: int):
+        with self._lock:
+            self.requested_tickers.append(ticker)
+            self.client_ports.add(client_port)
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests, self._concurrent_requests)
+
+    def on_request_end(self):
+        with self._lock:
+            self._concurrent_requests -= 1
+
+    def __enter__(self):
+        threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+
+def get_av_csv(ticker: str) -> str:
+    """
+    :return: daily data of the last 200 days, newest first, as AV sends it; the prices depend on the ticker
+    """
+    price = float(len(ticker))
+    rows = [f"{date.strftime('%Y-%m-%d')},{price},{price},{price},{price},100"
+            for date in reversed(date_range(end=Timestamp.now().normalize() - Timedelta(days=1), periods=200, freq="D"))]
+    return "\r\n".join(["timestamp,open,high,low,close,volume", *rows]) + "\r\n"
+
+
+class DownloadDailyHistoricalDataBulkTest(unittest.TestCase):
+    CONFIG_OVERRIDES = {
+        "ALPHA_VANTAGE_MAX_CONNECTIONS": MAX_CONNECTIONS,
+        "ALPHA_VANTAGE_MAX_RETRY": 2,
+        "ALPHA_VANTAGE_WAIT_SECONDS_BEFORE_FAILED_REQUEST_RETRY": 0,
+        "ALPHA_VANTAGE_RATE_LIMITER_ENABLED": False,
+        "MK_DATA_CACHE_ENABLED": True,
+        "MK_DATA_CACHE_OFFLINE": False,
+    }
+
+    def setUp(self):
+        overrides = {**self.CONFIG_OVERRIDES, "MK_DATA_CACHE_DIR": tempfile.mkdtemp()}
+        self.previous_config = {name: getattr(config, name) for name in [*overrides, "ALPHA_VANTAGE_BASE_URL"]}
+        for name, value in overrides.items():
+            setattr(config, name, value)
+
+        # each test gets its own connections pool
+        av_crypto_helper._session = None
+        self.server = StubAvServer().__enter__()
+        config.ALPHA_VANTAGE_BASE_URL = self.server.url
+
+    def tearDown(self):
+        self.server.__exit__()
+        av_crypto_helper._session = None
+        for name, value in self.previous_config.items():
+            setattr(config, name, value)
+
+    @staticmethod
+    def get_mk_data_requests(tickers):
+        today = Timestamp.now().normalize()
+        return [(ticker, today - Timedelta(days=50), today - Timedelta(days=10)) for ticker in tickers]
+
+    def test_requests_are_concurrent_and_reuse_the_connections(self):
+        tickers = [f"T{index}" for index in range(4 * MAX_CONNECTIONS)]
+
+        mk_data_list = av_crypto_helper.download_daily_historical_data_bulk(self.get_mk_data_requests(tickers))
+
+        self.assertEqual(tickers, [mk_data.ticker for mk_data in mk_data_list])
+        self.assertEqual(sorted(tickers), sorted(self.server.requested_tickers))
+        self.assertEqual(41, len(mk_data_list[0]))
+        self.assertGreater(self.server.max_concurrent_requests, 1)
+        self.assertLessEqual(self.server.max_concurrent_requests, MAX_CONNECTIONS)
+        self.assertLessEqual(len(self.server.client_ports), MAX_CONNECTIONS)
+
+    def test_failed_request_does_not_affect_the_other_ones(self):
+        tickers = ["T0", FAILING_TICKER, "T2", "T3"]
+
+        with self.assertRaises(MkDataBulkRequestError) as context:
+            av_crypto_helper.download_daily_historical_data_bulk(self.get_mk_data_requests(tickers))
+
+        error = context.exception
+        self.assertEqual([FAILING_TICKER], list(error.errors_by_ticker))
+        self.assertIsInstance(error.errors_by_ticker[FAILING_TICKER], MkDataRequestError)
+        self.assertEqual(["T0", None, "T2", "T3"], [mk_data.ticker if mk_data is not None else None for mk_data in error.mk_data_list])
+        # the failed request has been retried, and the successful ones have been cached
+        self.assertEqual(config.ALPHA_VANTAGE_MAX_RETRY, self.server.requested_tickers.count(FAILING_TICKER))
+        for ticker in ["T0", "T2", "T3"]:
+            self.assertIsNotNone(mk_data_cache.load(ticker, intervals.DAILY))
+        self.assertIsNone(mk_data_cache.load(FAILING_TICKER, intervals.DAILY))
+
+    def test_cached_data_is_not_downloaded_again(self):
+        mk_data_requests = self.get_mk_data_requests(["T0", "T1"])
+
+        av_crypto_helper.download_daily_historical_data_bulk(mk_data_requests)
+        av_crypto_helper.download_daily_historical_data_bulk(mk_data_requests)
+
+        self.assertEqual(["T0", "T1"], sorted(self.server.requested_tickers))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import json
+import os
+import pickle
+import tempfile
+import unittest
+
+import numpy as np
+from pandas import DataFrame, date_range
+
+from resources import config
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields, DATA_FIELDS
+from src.helper.mk_data import columnar_store
+
+
+def get_data(start: str, periods: int, first_value: float = 0.0) -> DataFrame:
+    index = date_range(start, periods=periods, freq=intervals.get_timedelta(intervals.DAILY), name=MkDataFields.TIMESTAMP)
+    return DataFrame({field: np.arange(first_value, first_value + periods) for field in DATA_FIELDS}, index=index)
+
+
+class ColumnarStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.previous_store_dir = config.MK_DATA_STORE_DIR
+        config.MK_DATA_STORE_DIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        config.MK_DATA_STORE_DIR = self.previous_store_dir
+
+    def test_opened_store_is_not_affected_by_a_later_save(self):
+        columnar_store.save("X", intervals.DAILY, get_data("2020-01-01", 10))
+        opened_data = columnar_store.open_store("X", intervals.DAILY)
+        pickled_data = pickle.dumps(opened_data.slice_positions(2, 5))
+
+        columnar_store.save("X", intervals.DAILY, get_data("2019-12-30", 20, first_value=100.0))
+
+        self.assertEqual(list(range(10)), opened_data.columns[MkDataFields.CLOSE].tolist())
+        self.assertEqual([2.0, 3.0, 4.0], pickle.loads(pickled_data).columns[MkDataFields.CLOSE].tolist())
+        self.assertEqual(20, len(columnar_store.open_store("X", intervals.DAILY)))
+
+    def test_save_keeps_only_the_previous_generation(self):
+        for first_value in [0.0, 100.0, 200.0]:
+            columnar_store.save("X", intervals.DAILY, get_data("2020-01-01", 10, first_value))
+
+        store_dir = columnar_store.get_store_dir("X", intervals.DAILY)
+        generations = [entry for entry in os.listdir(store_dir) if os.path.isdir(os.path.join(store_dir, entry))]
+        self.assertEqual(2, len(generations))
+        self.assertEqual(200.0, columnar_store.open_store("X", intervals.DAILY).columns[MkDataFields.CLOSE][0])
+
+    def test_interrupted_save_keeps_the_previous_data(self):
+        columnar_store.save("X", intervals.DAILY, get_data("2020-01-01", 10))
+
+        # columns written without the manifest being switched to them, as if the save crashed
+        store_dir = columnar_store.get_store_dir("X", intervals.DAILY)
+        os.makedirs(os.path.join(store_dir, "9" * 19))
+        np.save(os.path.join(store_dir, "9" * 19, f"{MkDataFields.TIMESTAMP}.npy"), np.arange(3))
+
+        self.assertEqual(10, len(columnar_store.open_store("X", intervals.DAILY)))
+
+    def test_store_with_columns_of_different_lengths_is_ignored(self):
+        columnar_store.save("X", intervals.DAILY, get_data("2020-01-01", 10))
+        manifest_path = os.path.join(columnar_store.get_store_dir("X", intervals.DAILY), "manifest.json")
+        with open(manifest_path, "r") as manifest_file:
+            generation = json.load(manifest_file)["generation"]
+        np.save(os.path.join(columnar_store.get_store_dir("X", intervals.DAILY), generation, f"{MkDataFields.CLOSE}.npy"), np.arange(5.0))
+
+        self.assertIsNone(columnar_store.open_store("X", intervals.DAILY))
+
+    def test_store_saved_without_generations_is_opened(self):
+        store_dir = columnar_store.get_store_dir("X", intervals.DAILY)
+        os.makedirs(store_dir)
+        data = get_data("2020-01-01", 10)
+        np.save(os.path.join(store_dir, f"{MkDataFields.TIMESTAMP}.npy"), data.index.to_numpy(dtype="datetime64[ns]").view(np.int64))
+        for field in DATA_FIELDS:
+            np.save(os.path.join(store_dir, f"{field}.npy"), data[field].to_numpy())
+
+        self.assertEqual(10, len(columnar_store.open_store("X", intervals.DAILY)))
+
+        columnar_store.save("X", intervals.DAILY, get_data("2020-01-01", 12))
+        self.assertEqual(12, len(columnar_store.open_store("X", intervals.DAILY)))
+        self.assertFalse([entry for entry in os.listdir(store_dir) if entry.endswith(".npy")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+from pandas import DataFrame, date_range
+
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields, DATA_FIELDS
+from src.model.mk_data import MkData
+from src.strategy.impl.mean_signal_strategy import MeanSignalStrategy
+
+MEAN_PERIODS = [2, 3, 5, 7, 10]
+
+
+def get_mk_data(seed: int, compact: bool, length: int = 300) -> MkData:
+    """
+    :return: market data whose close prices are often equal, or very close, to the mean of their window, where rounding decides the advice
+    """
+    random = np.random.default_rng(seed)
+    close_prices = np.round(random.choice([0.1, 0.2, 0.3, 0.7, 1.1, 3.3], length) + 1000 * random.integers(0, 2, length), 1)
+    index = date_range("2020-01-01", periods=length, freq=intervals.get_timedelta(intervals.DAILY), name=MkDataFields.TIMESTAMP)
+    data = DataFrame({field: close_prices for field in DATA_FIELDS}, index=index)
+    return MkData("X", index[0], index[-1], intervals.DAILY, data, compact=compact)
+
+
+class MeanSignalStrategyTest(unittest.TestCase):
+    def assert_batch_advices_equal_advices_per_subset(self, compact: bool):
+        for seed in range(10):
+            data = get_mk_data(seed, compact).data
+            signals_by_mean_period = MeanSignalStrategy.get_transaction_advices_by_subset_data_length(data, MEAN_PERIODS)
+
+            for mean_period, signals_of_mean_period in zip(MEAN_PERIODS, signals_by_mean_period):
+                strategy = MeanSignalStrategy(mean_period)
+                signals, _ = strategy.get_transaction_advices(data)
+                expected_signals = [strategy.get_transaction_advice(data.iloc[:end])[0].to_signal() for end in range(mean_period, len(data) + 1)]
+
+                with self.subTest(seed=seed, mean_period=mean_period):
+                    self.assertEqual(expected_signals, signals[mean_period - 1:].tolist())
+                    self.assertEqual(expected_signals, signals_of_mean_period[mean_period - 1:].tolist())
+
+    def test_batch_advices_equal_advices_per_subset(self):
+        self.assert_batch_advices_equal_advices_per_subset(compact=False)
+
+    def test_batch_advices_equal_advices_per_subset_on_compact_data(self):
+        self.assert_batch_advices_equal_advices_per_subset(compact=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+
+import numpy as np
+from pandas import DataFrame, Timestamp, date_range
+
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields, DATA_FIELDS
+from src.helper.mk_data.mk_data_cache import CachedMkData
+
+
+def get_data(start: str, end: str, interval: str) -> DataFrame:
+    index = date_range(start, end, freq=intervals.get_timedelta(interval), name=MkDataFields.TIMESTAMP)
+    return DataFrame({field: np.arange(len(index), dtype=np.float64) for field in DATA_FIELDS}, index=index)
+
+
+def get_epoch_seconds(date: str) -> float:
+    # the cache compares the fetch time in local time, see CachedMkData.covers_end
+    return Timestamp(date).to_pydatetime().timestamp()
+
+
+class CachedMkDataTest(unittest.TestCase):
+    def test_intraday_cache_fetched_mid_day_does_not_cover_the_whole_day(self):
+        fetched_at = get_epoch_seconds("2020-03-02 10:02")
+        cached_mk_data = CachedMkData(get_data("2020-03-01", "2020-03-02 10:00", intervals.MIN_5), fetched_at, is_full_history=False)
+
+        self.assertFalse(cached_mk_data.covers_end(Timestamp("2020-03-02"), intervals.MIN_5))
+        self.assertTrue(cached_mk_data.covers_end(Timestamp("2020-03-02 10:00"), intervals.MIN_5))
+        self.assertTrue(cached_mk_data.covers_end(Timestamp("2020-03-01"), intervals.MIN_5))
+
+    def test_intraday_cache_with_the_whole_day_covers_it(self):
+        fetched_at = get_epoch_seconds("2020-03-02 10:02")
+        cached_mk_data = CachedMkData(get_data("2020-03-01", "2020-03-01 23:55", intervals.MIN_5), fetched_at, is_full_history=False)
+
+        self.assertTrue(cached_mk_data.covers_end(Timestamp("2020-03-01"), intervals.MIN_5))
+        self.assertTrue(cached_mk_data.covers(Timestamp("2020-03-01"), Timestamp("2020-03-01"), intervals.MIN_5))
+
+    def test_daily_cache_covers_the_day_of_its_last_entry(self):
+        fetched_at = get_epoch_seconds("2020-03-02 10:02")
+        cached_mk_data = CachedMkData(get_data("2020-02-01", "2020-03-02", intervals.DAILY), fetched_at, is_full_history=True)
+
+        self.assertTrue(cached_mk_data.covers_end(Timestamp("2020-03-02"), intervals.DAILY))
+        self.assertFalse(cached_mk_data.covers_end(Timestamp("2020-03-03"), intervals.DAILY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+
+from src.constants import intervals
+from src.error.simulator_parameters_error import SimulatorParametersError
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+from src.strategy import strategy_factory
+from src.strategy.impl.ml_lstm_strategy import MlLstmStrategy
+
+
+class NoMkDataProvider(IMkDataProvider):
+    def get_name(self) -> str:
+        return "NoMkDataProvider"
+
+    def get_historical_data(self, ticker, interval, _from=None, to=None):
+        raise AssertionError("No market data is expected to be requested")
+
+
+class MlLstmStrategyTest(unittest.TestCase):
+    def test_daily_market_data_is_supported(self):
+        strategy = strategy_factory.get_concrete_strategy(MlLstmStrategy, "X", 10, NoMkDataProvider(), intervals.DAILY)
+
+        self.assertIsInstance(strategy, MlLstmStrategy)
+
+    def test_intraday_market_data_is_rejected(self):
+        for interval in intervals.INTRADAY_INTERVALS:
+            with self.subTest(interval=interval), self.assertRaises(SimulatorParametersError):
+                strategy_factory.get_concrete_strategy(MlLstmStrategy, "X", 10, NoMkDataProvider(), interval)
+
+
+if __name__ == "__main__":
+    unittest.main()
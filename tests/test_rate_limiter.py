@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.error.mk_data_request_error import MkDataRequestError
+from src.helper.mk_data.rate_limiter import RateLimiter
+
+REQUESTS_PER_MINUTE = 300
+PROCESSES = 3
+REQUESTS_PER_PROCESS = 4
+
+
+class StubServer:
+    """
+    Local HTTP server recording the time each request has been received at
+    """
+
+    def __init__(self):
+        self.request_times = []
+        request_times_lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with request_times_lock:
+                    server.request_times.append(time.time())
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = self
+        self._http_server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._http_server.server_address[1]}/"
+
+    def __enter__(self):
+        threading.Thread(target=self._http_server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+
+def send_requests(url: str, state_file_path: str, nr_of_requests: int, requests_per_day: int) -> int:
+    """
+    Sends the requests from a separate process, each one as soon as the limiter allows it
+    :return: nr. of requests rejected by the daily quota
+    """
+    rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, requests_per_day, state_file_path)
+    rejected_requests = 0
+    for _ in range(nr_of_requests):
+        try:
+            rate_limiter.acquire()
+        except MkDataRequestError:
+            rejected_requests += 1
+            continue
+        requests.get(url).raise_for_status()
+    return rejected_requests
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.state_file_path = os.path.join(tempfile.mkdtemp(), "rate_limiter.json")
+
+    def send_requests_from_processes(self, url: str, requests_per_day: int) -> int:
+        with ProcessPoolExecutor(max_workers=PROCESSES, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(send_requests, url, self.state_file_path, REQUESTS_PER_PROCESS, requests_per_day) for _ in range(PROCESSES)]
+            return sum(future.result() for future in futures)
+
+    def test_processes_share_the_rate_limit(self):
+        with StubServer() as server:
+            rejected_requests = self.send_requests_from_processes(server.url, requests_per_day=1000)
+
+        self.assertEqual(0, rejected_requests)
+        self.assertEqual(PROCESSES * REQUESTS_PER_PROCESS, len(server.request_times))
+        # requests are evenly spaced by the limiter; the margin covers the delay between the limiter and the server
+        request_times = sorted(server.request_times)
+        min_interval_seconds = min(later - earlier for earlier, later in zip(request_times, request_times[1:]))
+        self.assertGreater(min_interval_seconds, 0.5 * 60 / REQUESTS_PER_MINUTE)
+
+    def test_processes_share_the_daily_quota(self):
+        requests_per_day = 5
+        with StubServer() as server:
+            rejected_requests = self.send_requests_from_processes(server.url, requests_per_day)
+
+        self.assertEqual(requests_per_day, len(server.request_times))
+        self.assertEqual(PROCESSES * REQUESTS_PER_PROCESS - requests_per_day, rejected_requests)
+
+    def test_lock_is_released_when_the_locked_code_fails(self):
+        rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, 1000, self.state_file_path)
+
+        with self.assertRaises(ValueError), rate_limiter._lock():
+            raise ValueError("failure while the lock is held")
+
+        self.assertEqual(1000, rate_limiter.get_remaining_daily_requests())
+
+
+if __name__ == "__main__":
+    unittest.main()
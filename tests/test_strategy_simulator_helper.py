@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+from pandas import DataFrame, Timestamp, date_range
+
+from src.constants import intervals
+from src.constants.mk_data_fields import MkDataFields, DATA_FIELDS
+from src.error.mk_data_request_error import MkDataRequestError
+from src.error.simulator_parameters_error import SimulatorParametersError
+from src.helper.mk_data import mk_data_helper
+from src.mk_data_provider.mk_data_provider import IMkDataProvider
+from src.strategy_simulator import strategy_simulator_helper
+
+
+class MonthAlignedMkDataProvider(IMkDataProvider):
+    """
+    Serves daily data like AV serves intraday data: requests starting before the first month that can be requested fail,
+    while all the data available (e.g. cached) is served when the start is not given
+    """
+
+    def __init__(self, data: DataFrame, first_requestable_date: Timestamp):
+        self.data = data
+        self.first_requestable_date = first_requestable_date
+        self.requested_from_dates = []
+
+    def get_name(self) -> str:
+        return "MonthAlignedMkDataProvider"
+
+    def get_historical_data(self, ticker: str, interval: str, _from: Timestamp = None, to: Timestamp = None) -> DataFrame:
+        self.requested_from_dates.append(_from)
+        if _from is not None and _from < self.first_requestable_date:
+            raise MkDataRequestError(f"No data can be requested from '{_from}'")
+        return mk_data_helper.get_slice(self.data, _from, to)
+
+
+def get_data(start: str, end: str) -> DataFrame:
+    index = date_range(start, end, freq=intervals.get_timedelta(intervals.DAILY), name=MkDataFields.TIMESTAMP)
+    return DataFrame({field: np.arange(len(index), dtype=np.float64) for field in DATA_FIELDS}, index=index)
+
+
+class PrepareSimulationMkDataTest(unittest.TestCase):
+    def test_first_lookback_error_falls_back_to_all_the_data_available(self):
+        mk_data_provider = MonthAlignedMkDataProvider(get_data("2020-01-01", "2020-03-31"), Timestamp("2020-02-01"))
+
+        mk_data = strategy_simulator_helper.prepare_simulation_mk_data("X", 5, Timestamp("2020-02-03"), Timestamp("2020-02-29"), intervals.DAILY, mk_data_provider)
+
+        self.assertEqual([Timestamp("2020-01-30"), None], mk_data_provider.requested_from_dates)
+        self.assertEqual(Timestamp("2020-01-30"), Timestamp(mk_data.timestamps[0]))
+        self.assertEqual(4, mk_data.get_start_position())
+
+    def test_first_lookback_error_with_too_few_entries_available(self):
+        mk_data_provider = MonthAlignedMkDataProvider(get_data("2020-02-01", "2020-03-31"), Timestamp("2020-02-01"))
+
+        with self.assertRaises(SimulatorParametersError):
+            strategy_simulator_helper.prepare_simulation_mk_data("X", 5, Timestamp("2020-02-03"), Timestamp("2020-02-29"), intervals.DAILY, mk_data_provider)
+        self.assertEqual([Timestamp("2020-01-30"), None], mk_data_provider.requested_from_dates)
+
+
+if __name__ == "__main__":
+    unittest.main()